@@ -0,0 +1,138 @@
+"""
+Compares the translation of choices labels with the precomputed choices table
+against the previous exception based lookups, on a column where every label
+is a choice and on a column where most labels are not.
+
+usage: python benchmarks/choices.py [values]
+"""
+
+from __future__ import print_function
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import fields  # noqa: E402
+
+CHOICES = tuple((y, "choice {}".format(y)) for y in range(20))
+
+
+def legacy_cast(field, value):
+    """Field.cast with choices before the choices table was introduced"""
+    try:
+        return field.cast_method(field.choices_inv[value])
+    except:  # noqa: E722
+        try:
+            return field.choices_inv[value]
+        except ValueError as error:
+            error.args += (field.name,)
+            raise ValueError(error)
+        except KeyError as error:
+            error.args += (field.name,)
+            raise KeyError(error)
+
+
+def legacy_read(field, values):
+    casted = []
+    errors = []
+    for index, value in enumerate(values):
+        try:
+            casted.append(legacy_cast(field, value))
+        except Exception as error:
+            casted.append(value)
+            errors.append((index, error))
+    return casted, errors
+
+
+def table_read(field, values):
+    return field.cast_many(values)
+
+
+def legacy_to_excel(field, value):
+    """Field.to_excel before the choices table was introduced"""
+    if field.choices:
+        try:
+            value = field.choices[value]
+        except KeyError as error:
+            if value is not None:
+                raise KeyError(error)
+
+    if hasattr(value, "translate"):
+        value = str(value)
+
+    return value
+
+
+def legacy_write(field, values):
+    converted = []
+    for value in values:
+        try:
+            converted.append(legacy_to_excel(field, value))
+        except KeyError:
+            converted.append(value)
+    return converted
+
+
+def table_write(field, values):
+    convert = field.get_converter()
+    converted = []
+    for value in values:
+        try:
+            converted.append(convert(value))
+        except KeyError:
+            converted.append(value)
+    return converted
+
+
+def measure(function, field, values):
+    best = None
+    for repeat in range(5):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        function(field, values)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    field = fields.IntegerField(col=0, choices=CHOICES)
+    field.name = "kind"
+
+    columns = {
+        "hits": (
+            ["choice {}".format(y % 20) for y in range(count)],
+            [y % 20 for y in range(count)],
+        ),
+        "misses": (
+            ["other {}".format(y % 20) if y % 10 else "choice 1" for y in range(count)],
+            [y % 20 + 20 if y % 10 else 1 for y in range(count)],
+        ),
+    }
+
+    for column, (labels, keys) in columns.items():
+        for operation, legacy, table, values in (
+            ("read", legacy_read, table_read, labels),
+            ("write", legacy_write, table_write, keys),
+        ):
+            legacy_elapsed = measure(legacy, field, values)
+            table_elapsed = measure(table, field, values)
+            print(
+                "{:<7} {:<6} legacy {:8.3f}s table {:8.3f}s speedup {:6.2f}x".format(
+                    column,
+                    operation,
+                    legacy_elapsed,
+                    table_elapsed,
+                    legacy_elapsed / table_elapsed,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compares writing and reading the same rows with ExcelHandler as an xlsx file
+(in constant_memory mode, and with the xml backend to read it) and as a csv
+file.
+
+usage: python benchmarks/csv_export.py [rows]
+"""
+
+from __future__ import print_function
+import datetime
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import ExcelHandler  # noqa: E402
+from excel_handler import fields  # noqa: E402
+
+
+class BenchmarkExcelHandler(ExcelHandler):
+    number = fields.IntegerField(col=0, verbose_name="Number")
+    name = fields.CharField(col=1, verbose_name="Name")
+    amount = fields.FloatField(col=2, verbose_name="Amount")
+    created_at = fields.DateTimeField(col=3, verbose_name="Created at")
+    active = fields.BooleanField(col=4, verbose_name="Active")
+
+
+def generate(row_count):
+    now = datetime.datetime(2020, 1, 1, 12, 30)
+    return [
+        {
+            "number": y,
+            "name": "name {}".format(y % 1000),
+            "amount": y * 1.5,
+            "created_at": now,
+            "active": y % 2 == 0,
+        }
+        for y in range(row_count)
+    ]
+
+
+def write(path, data):
+    handler = BenchmarkExcelHandler(path=path, mode="w", constant_memory=True)
+    handler.add_sheet("Data")
+    handler.write(data, set_titles=True)
+    handler.save()
+
+
+def read(path):
+    with BenchmarkExcelHandler(path=path, backend="xml") as handler:
+        return handler.read(skip_titles=True)
+
+
+def measure(function, *args):
+    best = None
+    for repeat in range(3):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    data = generate(row_count)
+    folder = tempfile.mkdtemp()
+
+    results = {}
+    for format in ("xlsx", "csv"):
+        path = os.path.join(folder, "export." + format)
+        written = measure(write, path, data)
+        assert len(read(path)) == row_count
+        results[format] = (written, measure(read, path))
+        os.remove(path)
+
+    os.rmdir(folder)
+
+    for format, (written, read_time) in results.items():
+        print(
+            "{:<5} write {:7.3f}s {:10.0f} rows/s  read {:7.3f}s {:10.0f} "
+            "rows/s".format(
+                format,
+                written,
+                row_count / written,
+                read_time,
+                row_count / read_time,
+            )
+        )
+    print(
+        "speedup write {:6.2f}x  read {:6.2f}x".format(
+            results["xlsx"][0] / results["csv"][0],
+            results["xlsx"][1] / results["csv"][1],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
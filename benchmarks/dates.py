@@ -0,0 +1,97 @@
+"""
+Compares the conversion of excel serial dates with SerialDateConverter
+against openpyxl's from_excel, one value at a time and a whole column at a
+time, on a column where a few hundred dates repeat.
+
+usage: python benchmarks/dates.py [values]
+"""
+
+from __future__ import print_function
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from openpyxl.utils.datetime import from_excel  # noqa: E402
+
+from excel_handler.dates import SerialDateConverter  # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def measure(function, values):
+    best = None
+    for repeat in range(5):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        function(values)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    random.seed(0)
+    days = [44000 + random.randrange(365) for y in range(count)]
+    datetimes = [day + random.randrange(24 * 60) / (24.0 * 60) for day in days]
+
+    converter = SerialDateConverter()
+    cases = [
+        (
+            "datetime",
+            "from_excel",
+            datetimes,
+            lambda values: list(map(from_excel, values)),
+        ),
+        (
+            "datetime",
+            "to_datetime",
+            datetimes,
+            lambda values: list(map(converter.to_datetime, values)),
+        ),
+        ("datetime", "to_datetimes", datetimes, converter.to_datetimes),
+        (
+            "date",
+            "from_excel",
+            days,
+            lambda values: [from_excel(value).date() for value in values],
+        ),
+        ("date", "to_date", days, lambda values: list(map(converter.to_date, values))),
+        ("date", "to_dates", days, converter.to_dates),
+        (
+            "time",
+            "from_excel",
+            datetimes,
+            lambda values: [from_excel(value).time() for value in values],
+        ),
+        ("time", "to_times", datetimes, converter.to_times),
+    ]
+    if numpy is not None:
+        cases += [
+            ("datetime", "numpy", numpy.array(datetimes), converter.to_datetimes),
+            ("date", "numpy", numpy.array(days, dtype=float), converter.to_dates),
+        ]
+
+    baselines = {}
+    for column, name, values, function in cases:
+        elapsed = measure(function, values)
+        baselines.setdefault(column, elapsed)
+        print(
+            "{:<9} {:<13} {:8.3f}s {:12.0f} values/s speedup {:6.2f}x".format(
+                column, name, elapsed, count / elapsed, baselines[column] / elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares exporting a report of many sheets by writing each sheet with
+add_sheet and write against adding them with write_sheet, whose rows are
+rendered by worker processes when the document is saved.
+
+usage: python benchmarks/parallel_export.py [sheets] [rows] [workers]
+"""
+
+from __future__ import print_function
+import datetime
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import ExcelHandler  # noqa: E402
+from excel_handler import fields  # noqa: E402
+
+
+class BenchmarkExcelHandler(ExcelHandler):
+    number = fields.IntegerField(col=0, verbose_name="Number")
+    name = fields.CharField(col=1, verbose_name="Name")
+    amount = fields.FloatField(col=2, verbose_name="Amount")
+    created_at = fields.DateTimeField(col=3, verbose_name="Created at")
+
+
+def generate(row_count):
+    now = datetime.datetime(2020, 1, 1, 12, 30)
+    return [
+        {
+            "number": y,
+            "name": "name {}".format(y % 1000),
+            "amount": y * 1.5,
+            "created_at": now,
+        }
+        for y in range(row_count)
+    ]
+
+
+def sequential(path, sheet_count, data, workers):
+    handler = BenchmarkExcelHandler(path=path, mode="w")
+    for x in range(sheet_count):
+        handler.add_sheet("Sheet {}".format(x))
+        handler.write(data, set_titles=True)
+    handler.save()
+
+
+def parallel(path, sheet_count, data, workers):
+    handler = BenchmarkExcelHandler(path=path, mode="w")
+    for x in range(sheet_count):
+        handler.write_sheet("Sheet {}".format(x), data, set_titles=True)
+    handler.save(workers=workers)
+
+
+def main():
+    sheet_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    row_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    path = os.path.join(tempfile.mkdtemp(), "parallel_export.xlsx")
+    data = generate(row_count)
+
+    results = {}
+    for repeat in range(3):
+        for export in (sequential, parallel):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            export(path, sheet_count, data, workers)
+            elapsed = time.perf_counter() - start
+            gc.enable()
+
+            results[export.__name__] = min(
+                elapsed, results.get(export.__name__, elapsed)
+            )
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+    print(
+        "{} sheets of {} rows on {} cpus".format(sheet_count, row_count, os.cpu_count())
+    )
+    for name in ("sequential", "parallel"):
+        print("{:<10} {:8.3f}s".format(name, results[name]))
+    print("speedup    {:8.2f}x".format(results["sequential"] / results["parallel"]))
+
+
+if __name__ == "__main__":
+    main()
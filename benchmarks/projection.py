@@ -0,0 +1,93 @@
+"""
+Compares reading the field columns of a wide sheet by fetching every column
+up to the last field column against fetching only the field columns, with
+both reader backends. The handler declares a few fields scattered over the
+sheet.
+
+usage: python benchmarks/projection.py [rows] [columns]
+"""
+
+from __future__ import print_function
+import gc
+import os
+import sys
+import tempfile
+import time
+
+import xlsxwriter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import ExcelHandler  # noqa: E402
+from excel_handler import fields  # noqa: E402
+
+
+def make_handler_cls(column_count):
+    step = column_count // 8
+    attrs = dict(
+        ("field_{}".format(x), fields.FloatField(col=x * step + step // 2))
+        for x in range(8)
+    )
+    return type("BenchmarkExcelHandler", (ExcelHandler,), attrs)
+
+
+def generate(path, row_count, column_count):
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    sheet = workbook.add_worksheet()
+    for y in range(row_count):
+        for x in range(column_count):
+            sheet.write_number(y, x, x * y)
+    workbook.close()
+
+
+def full_width(handler):
+    """Fetches every column up to the last field and picks the field values"""
+    columns = [field.col for field in handler.fields]
+    rows = handler.sheet.iter_rows(max_col=max(columns) + 1, values_only=True)
+    for row in rows:
+        tuple(row[column] for column in columns)
+
+
+def projected(handler):
+    for row in handler.iter_field_rows():
+        pass
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    column_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    path = os.path.join(tempfile.mkdtemp(), "projection.xlsx")
+    generate(path, row_count, column_count)
+    handler_cls = make_handler_cls(column_count)
+
+    for backend in ("openpyxl", "xml"):
+        results = {}
+        for repeat in range(3):
+            for read in (full_width, projected):
+                with handler_cls(path=path, on_demand=True, backend=backend) as handler:
+                    gc.collect()
+                    gc.disable()
+                    start = time.perf_counter()
+                    read(handler)
+                    elapsed = time.perf_counter() - start
+                    gc.enable()
+                results[read.__name__] = min(
+                    elapsed, results.get(read.__name__, elapsed)
+                )
+
+        print(
+            "{:<9} full width {:7.3f}s  projected {:7.3f}s  speedup {:6.2f}x".format(
+                backend,
+                results["full_width"],
+                results["projected"],
+                results["full_width"] / results["projected"],
+            )
+        )
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares the rows per second of ExcelHandler.read with the openpyxl backend
+in on_demand mode and with the xml backend, on a generated sheet with many
+more columns than the handler reads.
+
+usage: python benchmarks/read_backends.py [rows] [columns]
+"""
+
+from __future__ import print_function
+import datetime
+import gc
+import os
+import sys
+import tempfile
+import time
+
+import xlsxwriter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import ExcelHandler  # noqa: E402
+from excel_handler import fields  # noqa: E402
+
+
+class BenchmarkExcelHandler(ExcelHandler):
+    number = fields.IntegerField(col=0)
+    name = fields.CharField(col=1)
+    created_at = fields.DateTimeField(col=2)
+
+
+def generate(path, row_count, column_count):
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    sheet = workbook.add_worksheet()
+    date_format = workbook.add_format({"num_format": "YYYY-MM-DD HH:MM:SS"})
+    now = datetime.datetime(2020, 1, 1, 12, 30)
+    for y in range(row_count):
+        sheet.write_number(y, 0, y)
+        sheet.write_string(y, 1, "name {}".format(y % 1000))
+        sheet.write_datetime(y, 2, now, date_format)
+        for x in range(3, column_count):
+            sheet.write_number(y, x, x * y)
+    workbook.close()
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    column_count = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    path = os.path.join(tempfile.mkdtemp(), "read_backends.xlsx")
+    generate(path, row_count, column_count)
+
+    results = {}
+    for repeat in range(3):
+        for backend in ("openpyxl", "xml"):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            with BenchmarkExcelHandler(
+                path=path, on_demand=True, backend=backend
+            ) as handler:
+                data = handler.read()
+            elapsed = time.perf_counter() - start
+            gc.enable()
+
+            assert len(data) == row_count
+            results[backend] = min(elapsed, results.get(backend, elapsed))
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+    for backend, elapsed in results.items():
+        print(
+            "{:<9} {:8.3f}s {:12.0f} rows/s".format(
+                backend, elapsed, row_count / elapsed
+            )
+        )
+    print("speedup   {:8.2f}x".format(results["openpyxl"] / results["xml"]))
+
+
+if __name__ == "__main__":
+    main()
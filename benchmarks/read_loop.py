@@ -0,0 +1,129 @@
+"""
+Compares the compiled column plan read loop of ExcelHandler.iter_read against
+the previous per cell field lookup loop, using an in memory sheet so only the
+python overhead of the loop is measured.
+
+usage: python benchmarks/read_loop.py [rows] [columns]
+"""
+
+from __future__ import print_function
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import ExcelHandler  # noqa: E402
+from excel_handler import fields  # noqa: E402
+
+
+class MemorySheet(object):
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_rows(
+        self, min_row=1, max_row=None, min_col=None, max_col=None, values_only=False
+    ):
+        rows = self.rows[min_row - 1 : max_row]
+        if min_col is None and max_col is None:
+            return iter(rows)
+        start = (min_col or 1) - 1
+        return (row[start:max_col] for row in rows)
+
+
+def build_handler(columns, rows):
+    attrs = {}
+    for col in range(columns):
+        attrs["field_{}".format(col)] = fields.IntegerField(col=col, default=0)
+    handler_cls = type("BenchmarkExcelHandler", (ExcelHandler,), attrs)
+
+    # the attributes ExcelHandler.__init__ sets for reading, without a file
+    handler = handler_cls.__new__(handler_cls)
+    handler.mode = "r"
+    handler.on_demand = False
+    handler.constant_memory = False
+    handler.backend = "openpyxl"
+    handler.format = "xlsx"
+    handler.path = None
+    handler.excel_file = None
+    handler.workbook = None
+    handler.sheet = MemorySheet(rows)
+    handler.parser = None
+    return handler
+
+
+def legacy_read(handler):
+    """The read loop before the column plan was introduced"""
+    data = []
+    for field in handler.fields:
+        field.prepare_read()
+
+    for row in handler.sheet.iter_rows(min_row=1, values_only=True):
+        row_data = {}
+        empty_fields = []
+
+        for x, value in enumerate(row):
+            try:
+                field = handler.fields[x]
+            except Exception:
+                break
+
+            if value is None:
+                empty_fields.append(value)
+
+            if value is None and hasattr(field, "default"):
+                default_value = field.default
+                if callable(default_value):
+                    value = default_value()
+                else:
+                    value = default_value
+            else:
+                value = field.cast(value, handler.workbook, row_data)
+
+            row_data[field.name] = value
+
+        if not len(empty_fields) == len(row_data):
+            data.append(row_data)
+
+    return data
+
+
+def plan_read(handler):
+    return handler.read()
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    rows = [
+        tuple(None if (y + x) % 10 == 0 else y + x for x in range(columns))
+        for y in range(row_count)
+    ]
+    handler = build_handler(columns, rows)
+
+    results = {}
+    for repeat in range(5):
+        for read in (legacy_read, plan_read):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            data = read(handler)
+            elapsed = time.perf_counter() - start
+            gc.enable()
+
+            assert len(data) == row_count
+            del data
+
+            results[read.__name__] = min(elapsed, results.get(read.__name__, elapsed))
+
+    for name, elapsed in results.items():
+        print(
+            "{:<12} {:8.3f}s {:12.0f} rows/s".format(name, elapsed, row_count / elapsed)
+        )
+    print("speedup      {:8.2f}x".format(results["legacy_read"] / results["plan_read"]))
+
+
+if __name__ == "__main__":
+    main()
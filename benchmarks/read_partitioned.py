@@ -0,0 +1,101 @@
+"""
+Compares the wall and cpu time of reading a sheet with read against
+read_partitioned with one range per worker (the default) and with ten
+ranges per worker. Every range parses the sheet from its first row, so the
+cpu time grows with the number of ranges, see ExcelHandler.read_partitioned.
+
+usage: python benchmarks/read_partitioned.py [rows] [workers]
+"""
+
+from __future__ import print_function
+import datetime
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import xlsxwriter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import ExcelHandler  # noqa: E402
+from excel_handler import fields  # noqa: E402
+
+
+class BenchmarkExcelHandler(ExcelHandler):
+    number = fields.IntegerField(col=0)
+    name = fields.CharField(col=1)
+    amount = fields.FloatField(col=2)
+    created_at = fields.DateTimeField(col=3)
+
+
+def generate(path, row_count):
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    sheet = workbook.add_worksheet()
+    date_format = workbook.add_format({"num_format": "YYYY-MM-DD HH:MM:SS"})
+    now = datetime.datetime(2020, 1, 1, 12, 30)
+    for y in range(row_count):
+        sheet.write_number(y, 0, y)
+        sheet.write_string(y, 1, "name {}".format(y % 1000))
+        sheet.write_number(y, 2, y * 1.5)
+        sheet.write_datetime(y, 3, now, date_format)
+    workbook.close()
+
+
+def cpu_time():
+    """The cpu time used by this process and its finished workers"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime + children.ru_utime + children.ru_stime
+
+
+def measure(read):
+    start_cpu = cpu_time()
+    start = time.perf_counter()
+    data = read()
+    return time.perf_counter() - start, cpu_time() - start_cpu, len(data)
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    path = os.path.join(tempfile.mkdtemp(), "read_partitioned.xlsx")
+    generate(path, row_count)
+
+    print("{} rows, {} workers, {} cpus".format(row_count, workers, os.cpu_count()))
+    for backend in ("openpyxl", "xml"):
+        handler = BenchmarkExcelHandler(path=path, on_demand=True, backend=backend)
+        reads = (
+            ("read", handler.read),
+            (
+                "1 range/worker",
+                lambda: handler.read_partitioned(workers=workers),
+            ),
+            (
+                "10 ranges/worker",
+                lambda: handler.read_partitioned(
+                    workers=workers, chunk_size=-(-row_count // (workers * 10))
+                ),
+            ),
+        )
+
+        base_cpu = None
+        for name, read in reads:
+            elapsed, cpu, rows = measure(read)
+            assert rows == row_count
+            base_cpu = base_cpu or cpu
+            print(
+                "{:<9} {:<17} wall {:7.3f}s  cpu {:7.3f}s ({:4.1f}x read)".format(
+                    backend, name, elapsed, cpu, cpu / base_cpu
+                )
+            )
+        handler.close()
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compares loading the whole shared strings table into a list against the
+lazy SharedStrings table of the xml backend, on a generated workbook with
+many unique strings: the time and memory used to open the workbook, and the
+time to read a numeric column and a string column afterwards.
+
+usage: python benchmarks/shared_strings.py [rows]
+"""
+
+from __future__ import print_function
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import xlsxwriter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import xml_reader  # noqa: E402
+
+
+class EagerXMLWorkbook(xml_reader.XMLWorkbook):
+    """The xml workbook loading all the shared strings when it is opened"""
+
+    def _shared_strings(self, path):
+        with self.archive.open(path) as source:
+            return list(xml_reader.iter_shared_strings(source))
+
+
+def generate(path, row_count):
+    workbook = xlsxwriter.Workbook(path)
+    sheet = workbook.add_worksheet()
+    for y in range(row_count):
+        sheet.write_number(y, 0, y)
+        sheet.write_string(y, 1, "unique string number {}".format(y))
+        sheet.write_string(y, 2, "description of row {} with more text".format(y))
+    workbook.close()
+
+
+def measure(workbook_cls, path):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    workbook = workbook_cls(path)
+    opened = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    sheet = workbook.worksheets[0]
+
+    start = time.perf_counter()
+    for row in sheet.iter_rows(max_col=1, values_only=True):
+        pass
+    numbers = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row in sheet.iter_rows(min_col=2, max_col=2, values_only=True):
+        pass
+    strings = time.perf_counter() - start
+
+    workbook.close()
+    return opened, memory, numbers, strings
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    path = os.path.join(tempfile.mkdtemp(), "shared_strings.xlsx")
+    generate(path, row_count)
+
+    for name, workbook_cls in (
+        ("list", EagerXMLWorkbook),
+        ("lazy", xml_reader.XMLWorkbook),
+    ):
+        opened, memory, numbers, strings = measure(workbook_cls, path)
+        print(
+            "{:<5} open {:7.3f}s {:8.1f} MB  numbers {:7.3f}s  strings "
+            "{:7.3f}s".format(name, opened, memory / 1e6, numbers, strings)
+        )
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compares the rows per second of ExcelHandler.write against the previous per
+cell Field.write dispatch. Only the time spent writing the rows is measured,
+not the time spent saving the workbook.
+
+usage: python benchmarks/write_rows.py [rows]
+"""
+
+from __future__ import print_function
+import datetime
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from excel_handler import ExcelHandler  # noqa: E402
+from excel_handler import fields  # noqa: E402
+
+
+class BenchmarkExcelHandler(ExcelHandler):
+    CHOICES = ((1, "one"), (2, "two"), (3, "three"))
+
+    number = fields.IntegerField(col=0)
+    amount = fields.FloatField(col=1)
+    name = fields.CharField(col=2)
+    code = fields.CharField(col=3)
+    kind = fields.IntegerField(col=4, choices=CHOICES)
+    created_at = fields.DateTimeField(col=5)
+    date = fields.DateField(col=6)
+    active = fields.BooleanField(col=7)
+
+
+def legacy_write(handler, data):
+    """The write loop before the write plan was introduced"""
+    row = 0
+    for field_name, field in handler.fieldname_to_field.items():
+        field.set_column_format(handler)
+        field.prepare_write()
+
+    for row_data in data:
+        for field_name, value in row_data.items():
+            try:
+                field = handler.fieldname_to_field[field_name]
+            except KeyError:
+                pass
+            else:
+                field.write(handler.workbook, handler.sheet, row, value)
+        row += 1
+
+
+def plan_write(handler, data):
+    handler.write(data)
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    now = datetime.datetime(2020, 1, 1, 12, 30)
+    data = [
+        {
+            "number": y,
+            "amount": y * 1.5,
+            "name": "name {}".format(y),
+            "code": "C{}".format(y % 100),
+            "kind": y % 3 + 1,
+            "created_at": now,
+            "date": now.date(),
+            "active": y % 2 == 0,
+        }
+        for y in range(row_count)
+    ]
+
+    tmp_dir = tempfile.mkdtemp()
+    results = {}
+    for repeat in range(3):
+        for write in (legacy_write, plan_write):
+            path = os.path.join(tmp_dir, "{}.xlsx".format(write.__name__))
+            handler = BenchmarkExcelHandler(path=path, mode="w")
+            handler.add_sheet("Data")
+
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            write(handler, data)
+            elapsed = time.perf_counter() - start
+            gc.enable()
+
+            results[write.__name__] = min(elapsed, results.get(write.__name__, elapsed))
+
+            handler.save()
+            os.remove(path)
+    os.rmdir(tmp_dir)
+
+    for name, elapsed in results.items():
+        print(
+            "{:<13} {:8.3f}s {:12.0f} rows/s".format(name, elapsed, row_count / elapsed)
+        )
+    print(
+        "speedup       {:8.2f}x".format(results["legacy_write"] / results["plan_write"])
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Caches used by the fields to keep lookups in memory"""
+
+import abc
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """A dict like mapping that keeps up to maxsize of its most used keys"""
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __getitem__(self, key):
+        value = self.data[key]
+        self.data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+
+        if self.maxsize is not None and len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def clear(self):
+        self.data.clear()
+
+
+class LookupCache(abc.ABC):
+    """
+    Base class of the caches that ForeignKeyField uses to share its lookup
+    maps between handler instances. Subclasses implement load, store,
+    invalidate and clear.
+
+    Entries expire ttl seconds after they are set (never when ttl is None).
+    The version is part of every key, so changing it invalidates all the
+    entries stored with the previous version. hits and misses count the
+    lookups made through get.
+    """
+
+    def __init__(self, ttl=None, version=1):
+        self.ttl = ttl
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, key):
+        return "{}:{}".format(self.version, key)
+
+    def get(self, key):
+        """Returns the value stored for key, or None if it is missing"""
+        entry = self.load(self.make_key(key))
+
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.time():
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = time.time() + self.ttl
+
+        self.store(self.make_key(key), (expires_at, value))
+
+    @abc.abstractmethod
+    def load(self, key):
+        """Returns the entry stored for the versioned key, or None"""
+
+    @abc.abstractmethod
+    def store(self, key, entry):
+        """Stores the (expires_at, value) entry of the versioned key"""
+
+    @abc.abstractmethod
+    def invalidate(self, key):
+        """Removes the entry of key"""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Removes every entry"""
+
+
+class MemoryLookupCache(LookupCache):
+    """Keeps the lookups in a dict shared by the handlers of this process"""
+
+    def __init__(self, ttl=None, version=1):
+        super(MemoryLookupCache, self).__init__(ttl=ttl, version=version)
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def load(self, key):
+        return self.entries.get(key)
+
+    def store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(self.make_key(key), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteLookupCache(LookupCache):
+    """
+    Keeps the lookups pickled in a sqlite3 database file, so they are shared
+    by every process using the same path
+    """
+
+    def __init__(self, path, ttl=None, version=1, timeout=30):
+        super(SQLiteLookupCache, self).__init__(ttl=ttl, version=version)
+        self.path = path
+        self.timeout = timeout
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        # sqlite connections cannot be shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self.path, timeout=self.timeout, check_same_thread=False
+            )
+            self._pid = os.getpid()
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS lookup_cache ("
+                    "key TEXT PRIMARY KEY, expires_at REAL, value BLOB)"
+                )
+        return self._connection
+
+    def load(self, key):
+        row = self.connection.execute(
+            "SELECT expires_at, value FROM lookup_cache WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        expires_at, value = row
+        return expires_at, pickle.loads(value)
+
+    def store(self, key, entry):
+        expires_at, value = entry
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO lookup_cache VALUES (?, ?, ?)",
+                (key, expires_at, sqlite3.Binary(value)),
+            )
+
+    def invalidate(self, key):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM lookup_cache WHERE key = ?", (self.make_key(key),)
+            )
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM lookup_cache")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
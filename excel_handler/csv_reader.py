@@ -0,0 +1,156 @@
+"""
+A read only backend for csv and tsv files. It implements the part of
+openpyxl's read only workbook and worksheet API that ExcelHandler uses to
+read, as xml_reader does for xlsx files. Rows are parsed with the csv module
+while they are iterated.
+"""
+
+import codecs
+import csv
+import io
+import os
+
+from contextlib import contextmanager
+from itertools import islice
+from operator import itemgetter
+
+from openpyxl.utils.cell import get_column_letter
+
+from .dates import WINDOWS_EPOCH
+
+
+class CSVWorkbook(object):
+    """
+    A csv file read as a workbook with a single sheet, whose cells are the
+    strings of the file. Blank cells are None.
+
+    source is a path or a file object, opened in binary or text mode.
+    """
+
+    # csv files declare no epoch, serial dates are read as excel does
+    epoch = WINDOWS_EPOCH
+
+    def __init__(self, source, delimiter=",", encoding="utf-8", title="Sheet1"):
+        self.source = source
+        self.delimiter = delimiter
+
+        # skip the byte order mark excel writes at the start of utf-8 files
+        if codecs.lookup(encoding).name == "utf-8":
+            encoding = "utf-8-sig"
+        self.encoding = encoding
+
+        self.worksheets = [CSVWorksheet(self, title)]
+
+    def __getitem__(self, name):
+        for worksheet in self.worksheets:
+            if worksheet.title == name:
+                return worksheet
+        raise KeyError("Worksheet {0} does not exist.".format(name))
+
+    @property
+    def sheetnames(self):
+        return [worksheet.title for worksheet in self.worksheets]
+
+    def close(self):
+        # files are only open while their rows are iterated
+        pass
+
+    @contextmanager
+    def open(self):
+        """Yields the file as text, from its start"""
+        if isinstance(self.source, (str, os.PathLike)):
+            with open(self.source, encoding=self.encoding, newline="") as text:
+                yield text
+            return
+
+        self.source.seek(0)
+        if isinstance(self.source, io.TextIOBase):
+            yield self.source
+            return
+
+        text = io.TextIOWrapper(self.source, encoding=self.encoding, newline="")
+        try:
+            yield text
+        finally:
+            # the file object belongs to the caller, it must stay open
+            text.detach()
+
+
+class CSVWorksheet(object):
+    """The sheet of a CSVWorkbook"""
+
+    def __init__(self, parent, title):
+        self.parent = parent
+        self.title = title
+
+        # unknown until the whole file is read, see calculate_dimension
+        self.max_row = None
+        self.max_column = None
+
+    def calculate_dimension(self, force=False):
+        """
+        Returns the dimension of the sheet, reading all the rows the first
+        time or with force
+        """
+        if force or self.max_row is None:
+            max_row = 0
+            max_column = 0
+            for line in self._iter_lines():
+                max_row += 1
+                max_column = max(max_column, len(line))
+            self.max_row = max_row or 1
+            self.max_column = max_column or 1
+
+        return "A1:{}{}".format(get_column_letter(self.max_column), self.max_row)
+
+    def _iter_lines(self):
+        with self.parent.open() as text:
+            yield from csv.reader(text, delimiter=self.parent.delimiter)
+
+    def iter_rows(
+        self,
+        min_row=None,
+        max_row=None,
+        min_col=None,
+        max_col=None,
+        values_only=True,
+        columns=None,
+    ):
+        """
+        Yields a tuple with the values of the cells from min_col to max_col of
+        each row from min_row to max_row, as openpyxl's read only worksheets
+        do with values_only.
+
+        When columns, a list of column numbers, is given the tuples have the
+        values of those columns only, in the same order, instead.
+        """
+        if not values_only:
+            raise ValueError("CSVWorksheet only reads values")
+
+        min_row = min_row or 1
+        lines = islice(self._iter_lines(), min_row - 1, max_row)
+
+        if columns is not None:
+            width = max(columns)
+            pick = itemgetter(*[column - 1 for column in columns])
+            single = len(columns) == 1
+            for line in lines:
+                if len(line) < width:
+                    line += [""] * (width - len(line))
+                values = pick(line)
+                if single:
+                    yield (values or None,)
+                else:
+                    yield tuple([value or None for value in values])
+            return
+
+        start = (min_col or 1) - 1
+        stop = max_col if max_col is not None else self.max_column
+        for line in lines:
+            if stop is not None:
+                if len(line) < stop:
+                    line += [""] * (stop - len(line))
+                line = line[start:stop]
+            elif start:
+                line = line[start:]
+            yield tuple([value or None for value in line])
@@ -0,0 +1,142 @@
+"""
+A streaming writer of csv and tsv files. It implements the part of
+xlsxwriter's workbook and worksheet API that ExcelHandler uses to write,
+writing each row to the file as soon as a later row is written.
+"""
+
+import csv
+import io
+import os
+
+from xlsxwriter.format import Format
+
+
+class CSVWriter(object):
+    """
+    Writes a csv file as a workbook with a single sheet.
+
+    target is a path or a file object, opened in binary or text mode, which
+    is left open when the document is closed.
+    """
+
+    def __init__(self, target, delimiter=",", encoding="utf-8"):
+        self.target = target
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.sheet = None
+        self.file = None
+        self.fileclosed = False
+
+    def add_worksheet(self, name=None, worksheet_class=None):
+        """Returns the sheet of the file, csv files only have one"""
+        if self.sheet is not None:
+            raise ValueError("csv files have a single sheet")
+
+        if isinstance(self.target, (str, os.PathLike)):
+            self.file = open(self.target, "w", encoding=self.encoding, newline="")
+        elif isinstance(self.target, io.TextIOBase):
+            self.file = self.target
+        else:
+            self.file = io.TextIOWrapper(
+                self.target, encoding=self.encoding, newline=""
+            )
+
+        writer = csv.writer(self.file, delimiter=self.delimiter)
+        self.sheet = CSVSheet(name or "Sheet1", writer)
+        return self.sheet
+
+    def worksheets(self):
+        return [self.sheet] if self.sheet is not None else []
+
+    def add_format(self, properties=None):
+        """
+        Returns a format with properties. Formats have no effect in csv
+        files, they are accepted for the handlers and fields that set them.
+        """
+        return Format(properties or {})
+
+    def close(self):
+        """Writes the last row and releases the file"""
+        if self.fileclosed:
+            return
+
+        if self.sheet is None:
+            # as xlsxwriter does, documents without sheets get an empty one
+            self.add_worksheet()
+        self.sheet.flush()
+
+        if isinstance(self.target, (str, os.PathLike)):
+            self.file.close()
+        elif self.file is not self.target:
+            # the file object belongs to the caller, it must stay open
+            self.file.detach()
+        else:
+            self.file.flush()
+        self.fileclosed = True
+
+
+class CSVSheet(object):
+    """
+    The sheet of a CSVWriter. The cells of a row are kept until a later row
+    is written, when the row is written to the file, so rows must be written
+    in order.
+    """
+
+    def __init__(self, name, writer):
+        self.name = name
+        self.writer = writer
+        self.row = 0
+        self.cells = {}
+        # the rows already written to the file
+        self.lines = 0
+
+    def write(self, row, col, value=None, cell_format=None):
+        if row != self.row:
+            self.set_current_row(row)
+        if value.__class__ is bool:
+            value = "TRUE" if value else "FALSE"
+        self.cells[col] = value
+
+    # values are written as text whatever their type
+    write_string = write
+    write_number = write
+    write_datetime = write
+    write_boolean = write
+    write_formula = write
+    write_blank = write
+
+    def set_column(self, *args, **kwargs):
+        pass
+
+    def set_row(self, *args, **kwargs):
+        pass
+
+    def set_current_row(self, row):
+        """Writes the cells of the current row before moving to row"""
+        if row < self.row:
+            raise ValueError(
+                "Cannot write row {} of sheet {} after row {}".format(
+                    row, self.name, self.row
+                )
+            )
+        self.flush()
+        self.row = row
+
+    def flush(self):
+        """Writes the current row, and the blank rows before it"""
+        cells = self.cells
+        if not cells:
+            return
+
+        writer = self.writer
+        for _ in range(self.lines, self.row):
+            writer.writerow(())
+
+        width = max(cells) + 1
+        if len(cells) == width:
+            writer.writerow([cells[col] for col in range(width)])
+        else:
+            writer.writerow([cells.get(col) for col in range(width)])
+
+        self.lines = self.row + 1
+        self.cells = {}
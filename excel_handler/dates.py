@@ -0,0 +1,204 @@
+"""
+Conversion of excel serial dates, the number of days since the epoch of the
+workbook, to python dates, datetimes and times
+"""
+
+import datetime
+import re
+
+from functools import lru_cache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# epochs of the 1900 (windows) and 1904 (mac) date systems
+WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+MAC_EPOCH = datetime.datetime(1904, 1, 1)
+
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+
+_midnight = datetime.datetime.combine(datetime.date.min, datetime.time())
+
+# dates and times in iso format, as isoformat and str write them, parsed
+# without datetime.fromisoformat, that python 3.6 lacks
+_ISO_TIME = (
+    r"(?P<hour>\d{2})(?::(?P<minute>\d{2})(?::(?P<second>\d{2})"
+    r"(?:\.(?P<fraction>\d{1,6}))?)?)?"
+    r"(?:(?P<utc>Z)|(?P<sign>[+-])(?P<offset_hour>\d{2}):?(?P<offset_minute>\d{2}))?"
+)
+ISO_DATETIME_REGEX = re.compile(
+    r"(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})(?:[T ]" + _ISO_TIME + r")?$"
+)
+ISO_TIME_REGEX = re.compile(_ISO_TIME + r"$")
+
+
+def _iso_time_fields(match):
+    """Returns the time fields, and tzinfo, of an iso format match"""
+    fraction = match.group("fraction") or ""
+    tzinfo = None
+    if match.group("utc"):
+        tzinfo = datetime.timezone.utc
+    elif match.group("sign"):
+        offset = datetime.timedelta(
+            hours=int(match.group("offset_hour")),
+            minutes=int(match.group("offset_minute")),
+        )
+        if match.group("sign") == "-":
+            offset = -offset
+        tzinfo = datetime.timezone(offset)
+
+    return (
+        int(match.group("hour") or 0),
+        int(match.group("minute") or 0),
+        int(match.group("second") or 0),
+        int(fraction.ljust(6, "0")),
+        tzinfo,
+    )
+
+
+def parse_iso_datetime(value):
+    """
+    Returns the datetime of a date or datetime in iso format, as
+    datetime.fromisoformat does. Raises ValueError for other values.
+    """
+    match = ISO_DATETIME_REGEX.match(value)
+    if match is None:
+        raise ValueError("Invalid isoformat string: {!r}".format(value))
+    return datetime.datetime(
+        int(match.group("year")),
+        int(match.group("month")),
+        int(match.group("day")),
+        *_iso_time_fields(match)
+    )
+
+
+def parse_iso_time(value):
+    """
+    Returns the time of a time in iso format, or the datetime of a datetime
+    in iso format. Raises ValueError for other values.
+    """
+    match = ISO_TIME_REGEX.match(value)
+    if match is None:
+        return parse_iso_datetime(value)
+    return datetime.time(*_iso_time_fields(match))
+
+
+class SerialDateConverter(object):
+    """
+    Converts serial dates of the workbooks that use epoch as openpyxl's
+    from_excel does. Dates repeat heavily in most columns, so the datetime of
+    each day serial is kept in an LRU cache of cache_size days.
+    """
+
+    def __init__(self, epoch=WINDOWS_EPOCH, cache_size=4096):
+        self.epoch = epoch
+        self.get_day = lru_cache(maxsize=cache_size)(self.day_to_datetime)
+
+        # the serial values of the days python datetimes can represent
+        self.min_serial = (datetime.datetime.min - epoch).days
+        self.max_serial = (datetime.datetime.max - epoch).days
+
+    def day_to_datetime(self, day):
+        """Returns the datetime of the start of the given day serial"""
+        if 0 < day < 60 and self.epoch == WINDOWS_EPOCH:
+            # excel counts 1900-02-29, that does not exist
+            day += 1
+        return self.epoch + datetime.timedelta(days=day)
+
+    def to_datetime(self, value):
+        """
+        Returns the datetime of the serial value. As with from_excel, values
+        between 0 and 1 are returned as times.
+        """
+        if value is None:
+            return None
+
+        day, fraction = divmod(value, 1)
+        if not fraction and day:
+            return self.get_day(int(day))
+
+        diff = datetime.timedelta(milliseconds=round(fraction * MILLISECONDS_PER_DAY))
+        if 0 <= value < 1:
+            if diff.days == 0:
+                return (_midnight + diff).time()
+            # fractions that round up to a whole day
+            if value > 0 and self.epoch == WINDOWS_EPOCH:
+                day += 1
+            return self.epoch + datetime.timedelta(days=day) + diff
+
+        return self.get_day(int(day)) + diff
+
+    def to_date(self, value):
+        """Returns the date of the serial value"""
+        if value is None:
+            return None
+        return self.get_day(int(value // 1)).date()
+
+    def to_time(self, value, tzinfo=None):
+        """Returns the time of day of the serial value"""
+        if value is None:
+            return None
+
+        diff = datetime.timedelta(milliseconds=round(value % 1 * MILLISECONDS_PER_DAY))
+        time = (_midnight + diff).time()
+        if tzinfo is not None:
+            return time.replace(tzinfo=tzinfo)
+        return time
+
+    def to_datetimes(self, values):
+        """
+        Converts a whole column of serial values. numpy arrays are converted
+        at once to a datetime64[ms] array, where values under 1 are days from
+        the epoch instead of times. Raises OverflowError, as to_datetime does,
+        when a value is out of the range of python datetimes.
+        """
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            if len(values) and (
+                values.min() < self.min_serial or values.max() > self.max_serial
+            ):
+                raise OverflowError("serial date out of range")
+            days, fractions = numpy.divmod(values, 1)
+            if self.epoch == WINDOWS_EPOCH:
+                days += (values >= 1) & (values < 60)
+            milliseconds = days * MILLISECONDS_PER_DAY + numpy.round(
+                fractions * MILLISECONDS_PER_DAY
+            )
+            return numpy.datetime64(self.epoch, "ms") + milliseconds.astype(
+                "timedelta64[ms]"
+            )
+
+        to_datetime = self.to_datetime
+        return [to_datetime(value) for value in values]
+
+    def to_dates(self, values):
+        """Converts a whole column of serial values to dates"""
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            return self.to_datetimes(values).astype("datetime64[D]")
+
+        to_date = self.to_date
+        return [to_date(value) for value in values]
+
+    def to_times(self, values, tzinfo=None):
+        """Converts a whole column of serial values to times of day"""
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            values = values.tolist()
+
+        to_time = self.to_time
+        return [to_time(value, tzinfo) for value in values]
+
+
+_converters = {}
+
+
+def get_serial_date_converter(workbook=None):
+    """
+    Returns the shared SerialDateConverter of the epoch of workbook, the
+    1900 date system when the workbook does not define one
+    """
+    epoch = getattr(workbook, "epoch", None) or WINDOWS_EPOCH
+    try:
+        return _converters[epoch]
+    except KeyError:
+        return _converters.setdefault(epoch, SerialDateConverter(epoch))
@@ -1,18 +1,65 @@
 from builtins import str, object
-from past.builtins import basestring
-from openpyxl.utils.datetime import from_excel
+import datetime
+
+from operator import attrgetter
+
+from .cache import LRUCache
+from .dates import get_serial_date_converter
+from .dates import parse_iso_datetime
+from .dates import parse_iso_time
+from .formats import get_format_registry
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# marks values that were looked up and do not exist
+_does_not_exist = object()
+
+# marks values that have not been looked up
+_missing = object()
 
 
 class Field(object):
+    # storage used for the column of this field by ExcelHandler.read_columns:
+    # an array.array typecode, or a numpy dtype used when numpy is installed.
+    # Fields without either are read into lists. The values of fields with a
+    # numpy_dtype must be instances of numpy_types, other values are read as
+    # values that could not be cast
+    array_typecode = None
+    numpy_dtype = None
+    numpy_types = ()
+
+    # name of the xlsxwriter worksheet method used to write values whose class
+    # is in cell_types. Other values (None, values of other types) are written
+    # with the generic sheet.write, which inspects their type
+    cell_writer = None
+    cell_types = ()
+
+    # whether the handler casts the values of this field one chunk of rows at
+    # a time with cast_many, instead of one cell at a time. Only used when
+    # cast is not overridden below the class that defines cast_many, since
+    # cast_many has no row_data
+    vectorized = False
+
     def __init__(self, col, **kwargs):
         self.col = col
 
+        # choices labels are matched ignoring their case and the whitespace
+        # around them when these options are set
+        self.choices_case_insensitive = kwargs.get("choices_case_insensitive", False)
+        self.choices_strip = kwargs.get("choices_strip", False)
+
         if "choices" in kwargs:
             self.choices_inv = dict((y, x) for x, y in kwargs["choices"])
             self.choices = dict((x, y) for x, y in kwargs["choices"])
         else:
             self.choices = None
 
+        # compiled when it is first used, after subclasses set cast_method
+        self._choices_table = None
+
         if "default" in kwargs:
             self.default = kwargs["default"]
 
@@ -28,28 +75,68 @@ class Field(object):
         else:
             self.verbose_name = ""
 
+        # other titles of the column of this field, used by handlers that
+        # bind their fields by header
+        self.aliases = tuple(kwargs.get("aliases", ()))
+
         self.format = None
 
+    @property
+    def choices_table(self):
+        """
+        Maps each (normalized) label of choices to the value cast returns for
+        it, so labels are translated with a single dict lookup. None for
+        fields without choices.
+        """
+        if self._choices_table is None and self.choices:
+            self.compile_choices()
+        return self._choices_table
+
+    def compile_choices(self):
+        """Builds choices_table"""
+        if not self.choices:
+            self._choices_table = None
+            return
+
+        cast_method = getattr(self, "cast_method", None)
+        table = {}
+        for key, label in self.choices.items():
+            if cast_method is not None:
+                try:
+                    key = cast_method(key)
+                except Exception:
+                    pass
+            table[self.normalize_choice(label)] = key
+        self._choices_table = table
+
+    def normalize_choice(self, label):
+        """Applies the choices_strip and choices_case_insensitive options"""
+        if isinstance(label, str):
+            if self.choices_strip:
+                label = label.strip()
+            if self.choices_case_insensitive:
+                label = label.lower()
+        return label
+
+    def translate_choice(self, label):
+        """Returns the value of the choice with label, or _missing"""
+        if self.choices_strip or self.choices_case_insensitive:
+            label = self.normalize_choice(label)
+        return self.choices_table.get(label, _missing)
+
     def __unicode__(self):
         return u"{}: {}".format(self.__class__.__name__, self.verbose_name)
 
     def cast(self, value, book, row_data):
-        if isinstance(value, basestring):
+        if isinstance(value, str):
             if value.strip() == "" and hasattr(self, "default"):
                 return self.default
 
         if self.choices:
-            try:
-                return self.cast_method(self.choices_inv[value])
-            except:
-                try:
-                    return self.choices_inv[value]
-                except ValueError as error:
-                    error.args += (self.name,)
-                    raise ValueError(error)
-                except KeyError as error:
-                    error.args += (self.name,)
-                    raise KeyError(error)
+            choice = self.translate_choice(value)
+            if choice is _missing:
+                raise KeyError(KeyError(value, self.name))
+            return choice
 
         try:
             return self.cast_method(value)
@@ -57,24 +144,217 @@ class Field(object):
             error.args += (self.name, value)
             raise ValueError(error)
 
+    def get_caster(self):
+        """
+        Returns the callable the handler uses to cast the values of this
+        field. Plain fields without choices get a version of cast with the
+        branches that do not apply to them removed; fields that override
+        cast are used as they are.
+        """
+        cast_method = getattr(self, "cast_method", None)
+        if type(self).cast is not Field.cast or self.choices or not cast_method:
+            return self.cast
+
+        has_default = hasattr(self, "default")
+        default = getattr(self, "default", None)
+        name = self.name
+
+        def cast(value, book, row_data):
+            if value.__class__ is str:
+                if has_default and value.strip() == "":
+                    return default
+            elif value.__class__ is cast_method:
+                return value
+
+            try:
+                return cast_method(value)
+            except ValueError as error:
+                error.args += (name, value)
+                raise ValueError(error)
+
+        return cast
+
+    def cast_many(self, values, book=None, skip_none=False):
+        """
+        Casts a sequence of values as cast would.
+
+        Returns a (values, errors) tuple, where errors is a list of
+        (index, exception) pairs for the values that could not be cast, which
+        are returned as they were. When skip_none is True, None values are
+        returned as they are instead of being cast.
+        """
+        if self.choices and type(self).cast is Field.cast:
+            return self.translate_choices(values, skip_none)
+
+        cast = self.get_caster()
+        try:
+            if skip_none:
+                return [
+                    None if value is None else cast(value, book, {}) for value in values
+                ], []
+            return [cast(value, book, {}) for value in values], []
+        except Exception:
+            pass
+
+        casted = []
+        errors = []
+        for index, value in enumerate(values):
+            if skip_none and value is None:
+                casted.append(None)
+                continue
+            try:
+                casted.append(cast(value, book, {}))
+            except Exception as error:
+                casted.append(value)
+                errors.append((index, error))
+
+        return casted, errors
+
+    def translate_choices(self, values, skip_none=False):
+        """
+        cast_many of fields with choices: labels that are not in choices are
+        reported as errors without raising an exception for each of them
+        """
+        table = self.choices_table
+        normalize = self.choices_strip or self.choices_case_insensitive
+        has_default = hasattr(self, "default")
+        default = getattr(self, "default", None)
+
+        casted = []
+        errors = []
+        for index, value in enumerate(values):
+            if value is None and skip_none:
+                casted.append(None)
+                continue
+
+            label = value
+            if value.__class__ is str:
+                if has_default and value.strip() == "":
+                    casted.append(default)
+                    continue
+                if normalize:
+                    label = self.normalize_choice(value)
+
+            try:
+                choice = table.get(label, _missing)
+            except TypeError as error:
+                # unhashable values
+                choice = _missing
+                errors.append((index, error))
+            else:
+                if choice is _missing:
+                    errors.append((index, KeyError(KeyError(value, self.name))))
+
+            casted.append(value if choice is _missing else choice)
+
+        return casted, errors
+
+    def get_prefetcher(self):
+        """
+        Returns a callable the handler calls with the values of this field in
+        each chunk of rows before casting them, or None if the field does not
+        need it
+        """
+        return None
+
+    def get_write_prefetcher(self):
+        """
+        Returns a callable the handler calls with the values of this field in
+        each chunk of rows before writing them, or None if the field does not
+        need it
+        """
+        return None
+
     def prepare_read(self):
         pass
 
     def prepare_write(self):
         pass
 
-    def write(self, workbook, sheet, row, value):
+    def to_excel(self, value):
+        """Converts a python value of this field to the value written in excel"""
         if self.choices:
-            try:
-                value = self.choices[value]
-            except KeyError as error:
-                if value is not None:
-                    raise KeyError(error)
+            label = self.choices.get(value, _missing)
+            if label is not _missing:
+                value = label
+            elif value is not None:
+                raise KeyError(KeyError(value))
 
         if hasattr(value, "translate"):
             value = str(value)
 
-        sheet.write(row, self.col, value)
+        return value
+
+    def write(self, workbook, sheet, row, value):
+        write = self.get_cell_writer(sheet)
+        write(row, self.col, self.to_excel(value))
+
+    def get_cell_writer(self, sheet):
+        """
+        Returns a callable(row, col, value) that writes values of cell_types
+        with the cell_writer method of sheet and any other value with
+        sheet.write
+        """
+        write = sheet.write
+        if not self.cell_writer:
+            return write
+
+        write_typed = getattr(sheet, self.cell_writer)
+        cell_types = self.cell_types
+
+        def write_cell(row, col, value):
+            if value.__class__ in cell_types:
+                write_typed(row, col, value)
+            else:
+                write(row, col, value)
+
+        return write_cell
+
+    def get_converter(self):
+        """
+        Returns the callable used to convert values of this field before
+        writing them, or None when values are written as they are
+        """
+        if type(self).to_excel is not Field.to_excel:
+            return self.to_excel
+
+        if not self.choices:
+            # python 3 strings already are native strings
+            return None
+
+        labels = dict(
+            (key, str(label) if hasattr(label, "translate") else label)
+            for key, label in self.choices.items()
+        )
+
+        def convert(value):
+            label = labels.get(value, _missing)
+            if label is not _missing:
+                return label
+            if value is not None:
+                raise KeyError(KeyError(value))
+            return value
+
+        return convert
+
+    def get_writer(self, workbook, sheet):
+        """
+        Returns a callable(row, value) that the handler uses to write the
+        values of this field in sheet. The conversion and the sheet method are
+        bound once per column; fields that override write are called through
+        it instead.
+        """
+        if type(self).write is not Field.write:
+            return lambda row, value: self.write(workbook, sheet, row, value)
+
+        col = self.col
+        convert = self.get_converter()
+        write = self.get_cell_writer(sheet)
+
+        if convert is None:
+            return lambda row, value: write(row, col, value)
+
+        return lambda row, value: write(row, col, convert(value))
 
     def set_column_format(self, handler):
         """
@@ -91,6 +371,11 @@ class Field(object):
 
 
 class BooleanField(Field):
+    numpy_dtype = "bool"
+    numpy_types = (bool,)
+    cell_writer = "write_boolean"
+    cell_types = (bool,)
+
     def __init__(self, col, *args, **kwargs):
         super(BooleanField, self).__init__(col, *args, **kwargs)
 
@@ -108,14 +393,112 @@ class BooleanField(Field):
         if value in ("=FALSE()",) or value is False:
             return False
 
+        # booleans as csv files have them
+        if value.__class__ is str:
+            label = value.strip().upper()
+            if label == "TRUE":
+                return True
+            if label == "FALSE":
+                return False
+
 
 class CharField(Field):
-    def __init__(self, col, *args, **kwargs):
-        super(CharField, self).__init__(col, *args, **kwargs)
-        self.cast_method = str
+    cell_writer = "write_string"
+    cell_types = (str,)
+    vectorized = True
+    cast_method = str
+
+    def cast_many(self, values, book=None, skip_none=False):
+        if (
+            self.choices
+            or type(self).cast is not Field.cast
+            or self.cast_method is not str
+        ):
+            return super(CharField, self).cast_many(values, book, skip_none)
+
+        types = set(map(type, values))
+        if skip_none:
+            types.discard(type(None))
+
+        if types <= {str}:
+            # blank strings are replaced by the default
+            strings = values
+            if skip_none and None in values:
+                strings = [value for value in values if value is not None]
+            if not hasattr(self, "default") or "" not in map(str.strip, strings):
+                return list(values), []
+        elif types <= {int, float} and None not in values:
+            return list(map(str, values)), []
+
+        return super(CharField, self).cast_many(values, book, skip_none)
+
+    def get_cell_writer(self, sheet):
+        """
+        Strings are written with write_string unless sheet.write would write
+        them as something else: empty strings are blank cells, and strings
+        starting with "=" or "{=" or containing urls are written as formulas
+        and links
+        """
+        write = sheet.write
+        write_string = sheet.write_string
+
+        def write_cell(row, col, value):
+            if (
+                value.__class__ is str
+                and value
+                and value[0] not in "={"
+                and ":" not in value
+            ):
+                write_string(row, col, value)
+            else:
+                write(row, col, value)
+
+        return write_cell
+
+
+def _cast_dates(field, cast, values, book, skip_none, batch, native_type, convert):
+    """
+    cast_many of the date fields: columns of serial numbers are converted at
+    once with batch and columns of native_type values with convert (kept as
+    they are when convert is None), other values are cast one by one. So are
+    the columns batch fails to convert, to report the values it fails on.
+    """
+    if type(field).cast is not cast:
+        return Field.cast_many(field, values, book, skip_none)
+
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype.kind in "iuf" and numpy.isfinite(values).all():
+            try:
+                return batch(values), []
+            except (ValueError, OverflowError):
+                pass
+        values = values.tolist()
+
+    types = set(map(type, values))
+    if skip_none:
+        types.discard(type(None))
+
+    if types <= {int, float}:
+        try:
+            return batch(values), []
+        except (ValueError, OverflowError):
+            return Field.cast_many(field, values, book, skip_none)
+
+    if types <= {native_type}:
+        if convert is None:
+            return list(values), []
+        return [None if value is None else convert(value) for value in values], []
+
+    return Field.cast_many(field, values, book, skip_none)
 
 
 class DateTimeField(Field):
+    numpy_dtype = "datetime64[us]"
+    numpy_types = (datetime.date,)
+    cell_writer = "write_datetime"
+    cell_types = (datetime.datetime, datetime.date, datetime.time)
+    vectorized = True
+
     def __init__(self, *args, **kwargs):
         self.tzinfo = kwargs.pop("tzinfo", None)
 
@@ -126,12 +509,32 @@ class DateTimeField(Field):
             if callable(self.default):
                 return self.default()
             return self.default
+        if value.__class__ in (int, float):
+            return get_serial_date_converter(workbook).to_datetime(value)
+        if value.__class__ is str:
+            # dates in iso format, as csv files have them
+            try:
+                return parse_iso_datetime(value)
+            except ValueError:
+                pass
         return value
 
-    def write(self, workbook, sheet, row, value):
+    def cast_many(self, values, book=None, skip_none=False):
+        return _cast_dates(
+            self,
+            DateTimeField.cast,
+            values,
+            book,
+            skip_none,
+            get_serial_date_converter(book).to_datetimes,
+            datetime.datetime,
+            None,
+        )
+
+    def to_excel(self, value):
         if value:
             value = value.replace(tzinfo=None)
-        sheet.write(row, self.col, value)
+        return value
 
     def set_column_format(self, handler):
         """
@@ -143,11 +546,17 @@ class DateTimeField(Field):
         )
 
     def set_format(self, workbook, sheet):
-        date_format = workbook.add_format({"num_format": "MM/DD/YYYY HH:MM:SS"})
+        date_format = get_format_registry(workbook).get(
+            {"num_format": "MM/DD/YYYY HH:MM:SS"}
+        )
         sheet.set_column(self.col, self.col, 18, date_format)
 
 
 class TimeField(Field):
+    cell_writer = "write_datetime"
+    cell_types = (datetime.time, datetime.datetime)
+    vectorized = True
+
     def __init__(self, *args, **kwargs):
         self.tzinfo = kwargs.pop("tzinfo", None)
 
@@ -159,15 +568,32 @@ class TimeField(Field):
                 return self.default()
             return self.default
 
-        value = value - int(value)
-        time = from_excel(value).time()
-        return time.replace(tzinfo=self.tzinfo)
+        if value.__class__ in (int, float):
+            return get_serial_date_converter(workbook).to_time(value, self.tzinfo)
+        if value.__class__ is str:
+            value = parse_iso_time(value)
+        if isinstance(value, datetime.datetime):
+            value = value.time()
+        return value.replace(tzinfo=self.tzinfo)
+
+    def cast_many(self, values, book=None, skip_none=False):
+        tzinfo = self.tzinfo
+        return _cast_dates(
+            self,
+            TimeField.cast,
+            values,
+            book,
+            skip_none,
+            lambda values: get_serial_date_converter(book).to_times(values, tzinfo),
+            datetime.time,
+            lambda value: value.replace(tzinfo=tzinfo),
+        )
 
-    def write(self, workbook, sheet, row, value):
+    def to_excel(self, value):
         if value:
             # xslx writer does not handle timezone aware values
             value = value.replace(tzinfo=None)
-        sheet.write(row, self.col, value)
+        return value
 
     def set_column_format(self, handler):
         """
@@ -179,11 +605,13 @@ class TimeField(Field):
         )
 
     def set_format(self, workbook, sheet):
-        date_format = workbook.add_format({"num_format": "HH:MM:SS"})
+        date_format = get_format_registry(workbook).get({"num_format": "HH:MM:SS"})
         sheet.set_column(self.col, self.col, 18, date_format)
 
 
 class DateField(DateTimeField):
+    numpy_dtype = "datetime64[D]"
+
     def cast(self, value, workbook, row_data):
         if value == "":
             if hasattr(self, "default"):
@@ -192,10 +620,26 @@ class DateField(DateTimeField):
                 return self.default
             else:
                 return None
+        if value.__class__ in (int, float):
+            return get_serial_date_converter(workbook).to_date(value)
+        if value.__class__ is str:
+            return parse_iso_datetime(value).date()
         return value.date()
 
-    def write(self, workbook, sheet, row, value):
-        sheet.write(row, self.col, value)
+    def cast_many(self, values, book=None, skip_none=False):
+        return _cast_dates(
+            self,
+            DateField.cast,
+            values,
+            book,
+            skip_none,
+            get_serial_date_converter(book).to_dates,
+            datetime.datetime,
+            datetime.datetime.date,
+        )
+
+    def to_excel(self, value):
+        return value
 
     def set_column_format(self, handler):
         """
@@ -207,7 +651,7 @@ class DateField(DateTimeField):
         )
 
     def set_format(self, workbook, sheet):
-        date_format = workbook.add_format({"num_format": "MM/DD/YYYY"})
+        date_format = get_format_registry(workbook).get({"num_format": "MM/DD/YYYY"})
         sheet.set_column(self.col, self.col, 15, date_format)
 
 
@@ -216,19 +660,83 @@ class DjangoModelField(Field):
     This field translates excel values to django models and viceversa
     """
 
-    def __init__(self, col, model, lookup="pk", *args, **kwargs):
+    def __init__(
+        self, col, model, lookup="pk", batch=False, cache_size=10000, *args, **kwargs
+    ):
+        """
+        When batch is True, the handler collects the values of each chunk of
+        rows it reads and the field resolves them with a single
+        filter(<lookup>__in=...) query, keeping the models found in a cache of
+        up to cache_size values.
+        """
         super(DjangoModelField, self).__init__(col, *args, **kwargs)
 
         self.lookup = lookup
 
         self.model = model
 
+        self.batch = batch
+        self.cache = LRUCache(cache_size) if batch else None
+        self.get_lookup = attrgetter(lookup.replace("__", "."))
+
     def cast(self, value, workbook, row_data):
-        return self.model.objects.get(**{self.lookup: value})
+        if self.cache is None:
+            return self.model.objects.get(**{self.lookup: value})
+
+        obj = self.cache.get(value)
+        if obj is None:
+            obj = self.model.objects.get(**{self.lookup: value})
+            self.cache[value] = obj
+        elif obj is _does_not_exist:
+            raise self.model.DoesNotExist(
+                "%s matching query does not exist. "
+                "Lookup parameters were %s"
+                % (self.model._meta.object_name, {self.lookup: value})
+            )
+        return obj
 
-    def write(self, workbook, sheet, row, value):
-        value = getattr(value, self.lookup)
-        super(DjangoModelField, self).write(self, workbook, sheet, row, value)
+    def get_prefetcher(self):
+        if self.batch:
+            return self.prefetch
+
+    def prefetch(self, values):
+        """Resolves the values that are not cached with a single query"""
+        values = set(value for value in values if value not in self.cache)
+        values.discard(None)
+        if not values:
+            return
+
+        try:
+            objects = list(self.model.objects.filter(**{self.lookup + "__in": values}))
+        except (TypeError, ValueError):
+            # a value the lookup can not take fails the whole query, the
+            # values are left for cast, that reports the error of its row
+            return
+
+        found = {}
+        for obj in objects:
+            value = self.get_lookup(obj)
+            self.cache[value] = obj
+            found[value] = obj
+
+        # the database casts the values to the type of the lookup, so the
+        # objects are mapped back to the values of the sheet, which may be
+        # text, as in csv files, by their text when they are not equal
+        found_text = dict((str(value), obj) for value, obj in found.items())
+        for value in values:
+            obj = found.get(value, _missing)
+            if obj is _missing:
+                obj = found_text.get(str(value), _does_not_exist)
+            self.cache[value] = obj
+
+    def prepare_read(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+    def to_excel(self, value):
+        if value is not None:
+            value = self.get_lookup(value)
+        return super(DjangoModelField, self).to_excel(value)
 
 
 class ForeignKeyField(Field):
@@ -244,9 +752,29 @@ class ForeignKeyField(Field):
         default_on_lookup_fail=False,
         case_insensitive=False,
         on_lookup_fail=None,
+        lookup_strategy="full",
+        cache_size=None,
+        cache=None,
         *args,
         **kwargs
     ):
+        """
+        lookup_strategy defines how the lookup values are translated to
+        primary keys:
+
+        "full" loads the lookup of every row of the model in prepare_read.
+
+        "on_demand" only resolves the values found in the sheet, with one
+        <lookup>__in query per chunk of rows read (or per chunk of rows
+        written, for the primary keys), keeping them in caches of up to
+        cache_size values.
+
+        cache is a LookupCache used by the "full" strategy to share the
+        lookups loaded between handler instances (and processes, with a file
+        backed cache) instead of loading them on every read and write.
+        """
+        if lookup_strategy not in ("full", "on_demand"):
+            raise ValueError("Unknown lookup_strategy {!r}".format(lookup_strategy))
 
         super(ForeignKeyField, self).__init__(col, *args, **kwargs)
 
@@ -255,66 +783,233 @@ class ForeignKeyField(Field):
         self.default_on_lookup_fail = default_on_lookup_fail
         self.case_insensitive = case_insensitive
         self.on_lookup_fail = on_lookup_fail
+        self.lookup_strategy = lookup_strategy
+        self.cache_size = cache_size
+        self.cache = cache
+
+    @property
+    def cache_key(self):
+        return "{}.{}:{}:{}".format(
+            self.model.__module__,
+            self.model.__name__,
+            self.lookup,
+            self.case_insensitive,
+        )
 
-    def cast(self, value, workbook, row_data):
-        if value == "" and hasattr(self, "default"):
-            return self.default
-
+    def normalize(self, value):
+        """Returns value as it is stored in lookup_to_pk"""
         if value:
             value = self.lookup_type(value)
 
             if self.case_insensitive:
                 value = value.lower()
+        return value
 
-        try:
-            return self.lookup_to_pk[value]
-        except KeyError:
-            msg = "%s matching query does not exist. " "Lookup parameters were %s" % (
-                self.model._meta.object_name,
-                {self.lookup: value},
-            )
-            if self.on_lookup_fail:
-                return self.on_lookup_fail(row_data, value)
+    def cast(self, value, workbook, row_data):
+        if value == "" and hasattr(self, "default"):
+            return self.default
 
-            if self.default_on_lookup_fail:
-                return self.default
+        value = self.normalize(value)
 
-            raise self.model.DoesNotExist(msg)
+        pk = self.lookup_to_pk.get(value, _missing)
+        if pk is _missing and self.lookup_strategy == "on_demand":
+            self.prefetch([value])
+            pk = self.lookup_to_pk.get(value, _missing)
 
-    def write(self, workbook, sheet, row, value):
+        if pk is not _missing and pk is not _does_not_exist:
+            return pk
+
+        msg = "%s matching query does not exist. " "Lookup parameters were %s" % (
+            self.model._meta.object_name,
+            {self.lookup: value},
+        )
+        if self.on_lookup_fail:
+            return self.on_lookup_fail(row_data, value)
+
+        if self.default_on_lookup_fail:
+            return self.default
+
+        raise self.model.DoesNotExist(msg)
+
+    def to_excel(self, value):
         if self.lookup != "pk" and self.lookup != "id" and value is not None:
-            value = self.pk_to_lookup[value]
+            lookup = self.pk_to_lookup.get(value, _missing)
+            if lookup is _missing and self.lookup_strategy == "on_demand":
+                self.prefetch_pks([value])
+                lookup = self.pk_to_lookup.get(value, _missing)
+
+            if lookup is _missing:
+                raise KeyError(value)
+            value = lookup
+
+        return super(ForeignKeyField, self).to_excel(value)
 
-        super(ForeignKeyField, self).write(workbook, sheet, row, value)
+    def get_objects(self):
+        objects = self.model.objects.all()
+        objects = objects.exclude(**{self.lookup: None})
+        return objects
 
     def prepare_read(self):
-        self.objects = self.model.objects.all()
-        self.objects = self.objects.exclude(**{self.lookup: None})
-        self.objects = self.objects.values_list("id", self.lookup)
+        if self.lookup_strategy == "on_demand":
+            self.pk_to_lookup = LRUCache(self.cache_size)
+            self.lookup_to_pk = LRUCache(self.cache_size)
+
+            first = list(self.get_objects().values_list("id", self.lookup)[:1])
+            try:
+                self.lookup_type = type(first[0][1])
+            except IndexError:
+                self.lookup_type = str
+            return
+
+        if self.cache is not None:
+            lookups = self.cache.get(self.cache_key)
+            if lookups is not None:
+                self.lookup_type, self.pk_to_lookup, self.lookup_to_pk = lookups
+                return
+
+        self.objects = objects = list(self.get_objects().values_list("id", self.lookup))
 
         try:
-            self.lookup_type = type(self.objects[0][1])
-        except:
+            self.lookup_type = type(objects[0][1])
+        except IndexError:
             self.lookup_type = str
 
-        self.pk_to_lookup = dict(self.objects)
+        self.pk_to_lookup = dict(objects)
 
         if self.case_insensitive:
-            self.lookup_to_pk = dict((y.lower(), x) for x, y in self.objects if y)
+            self.lookup_to_pk = dict((y.lower(), x) for x, y in objects if y)
         else:
-            self.lookup_to_pk = dict((y, x) for x, y in self.objects)
+            self.lookup_to_pk = dict((y, x) for x, y in objects)
+
+        if self.cache is not None:
+            self.cache.set(
+                self.cache_key,
+                (self.lookup_type, self.pk_to_lookup, self.lookup_to_pk),
+            )
 
     def prepare_write(self):
         self.prepare_read()
 
+    def get_prefetcher(self):
+        if self.lookup_strategy == "on_demand":
+            return self.prefetch
+
+    def get_write_prefetcher(self):
+        if self.lookup_strategy == "on_demand":
+            return self.prefetch_pks
+
+    def prefetch(self, values):
+        """Resolves the lookup values that are not cached with a single query"""
+        lookups = set()
+        for value in values:
+            if value == "":
+                continue
+            try:
+                value = self.normalize(value)
+            except (TypeError, ValueError):
+                # left for cast, that reports it as the error of its row
+                continue
+            if value is not None and value not in self.lookup_to_pk:
+                lookups.add(value)
+        values = lookups
+        if not values:
+            return
+
+        objects = self.get_objects()
+        if self.case_insensitive:
+            from django.db.models.functions import Lower
+
+            objects = objects.annotate(lookup_lower=Lower(self.lookup))
+            objects = objects.filter(lookup_lower__in=values)
+        else:
+            objects = objects.filter(**{self.lookup + "__in": values})
+
+        objects = list(objects.values_list("id", self.lookup))
+        self.cache_lookups(objects)
+
+        # the cache may have evicted some of the values found already, only
+        # the values missing from the results do not exist
+        if self.case_insensitive:
+            found = set(lookup.lower() for pk, lookup in objects if lookup)
+        else:
+            found = set(lookup for pk, lookup in objects)
+        for value in values - found:
+            self.lookup_to_pk[value] = _does_not_exist
+
+    def prefetch_pks(self, pks):
+        """Resolves the lookups of the primary keys that are not cached"""
+        pks = set(pk for pk in pks if pk not in self.pk_to_lookup)
+        pks.discard(None)
+        if not pks:
+            return
+
+        objects = self.get_objects().filter(pk__in=pks)
+        self.cache_lookups(objects.values_list("id", self.lookup))
+
+    def cache_lookups(self, objects):
+        for pk, lookup in objects:
+            self.pk_to_lookup[pk] = lookup
+            if self.case_insensitive:
+                if lookup:
+                    self.lookup_to_pk[lookup.lower()] = pk
+            else:
+                self.lookup_to_pk[lookup] = pk
+
+
+def _cast_numbers(field, values, book, skip_none, number_type, dtype):
+    """
+    cast_many of the numeric fields: numpy arrays are cast with astype and
+    lists of numbers are converted with a single map call, other values are
+    cast one by one. Fields with a cast_method of their own are always cast
+    one by one.
+    """
+    if (
+        field.choices
+        or type(field).cast is not Field.cast
+        or field.cast_method is not number_type
+    ):
+        return Field.cast_many(field, values, book, skip_none)
+
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype.kind in "biu" or (
+            values.dtype.kind == "f" and numpy.isfinite(values).all()
+        ):
+            return values.astype(dtype), []
+        values = values.tolist()
+
+    types = set(map(type, values))
+    if skip_none:
+        types.discard(type(None))
+
+    if types <= {number_type}:
+        return list(values), []
+
+    if types <= {int, float} and None not in values:
+        try:
+            return list(map(number_type, values)), []
+        except (ValueError, OverflowError):
+            pass
+
+    return Field.cast_many(field, values, book, skip_none)
+
 
 class IntegerField(Field):
-    def __init__(self, col, *args, **kwargs):
-        super(IntegerField, self).__init__(col, *args, **kwargs)
-        self.cast_method = int
+    array_typecode = "q"
+    cell_writer = "write_number"
+    cell_types = (int, float)
+    vectorized = True
+    cast_method = int
+
+    def cast_many(self, values, book=None, skip_none=False):
+        return _cast_numbers(self, values, book, skip_none, int, "int64")
 
 
 class FloatField(Field):
-    def __init__(self, col, *args, **kwargs):
-        super(FloatField, self).__init__(col, *args, **kwargs)
-        self.cast_method = float
+    array_typecode = "d"
+    cell_writer = "write_number"
+    cell_types = (int, float)
+    vectorized = True
+    cast_method = float
+
+    def cast_many(self, values, book=None, skip_none=False):
+        return _cast_numbers(self, values, book, skip_none, float, "float64")
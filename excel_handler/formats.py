@@ -0,0 +1,73 @@
+"""Shared xlsxwriter formats of the workbooks being written"""
+
+import threading
+import weakref
+
+
+class FormatRegistry(object):
+    """
+    Creates the formats of an xlsxwriter workbook once per set of properties,
+    so writing the same format in many calls, sheets or fields does not add
+    a duplicate format to the workbook each time.
+
+    hits and misses count the formats that were reused and created, and
+    created the formats made with create.
+    """
+
+    def __init__(self, workbook):
+        # registries are kept by workbook in a WeakKeyDictionary, they must
+        # not keep their workbook alive
+        self.workbook = weakref.ref(workbook)
+        self.formats = {}
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of unique formats created"""
+        return len(self.formats) + self.created
+
+    def get(self, properties=None):
+        """
+        Returns the format with properties, a dict of xlsxwriter format
+        properties
+        """
+        properties = properties or {}
+        key = tuple(sorted(properties.items()))
+
+        with self.lock:
+            cell_format = self.formats.get(key)
+            if cell_format is not None:
+                self.hits += 1
+                return cell_format
+
+            self.misses += 1
+            cell_format = self.workbook().add_format(dict(properties))
+            self.formats[key] = cell_format
+            return cell_format
+
+    def create(self, setup):
+        """
+        Returns a new format, whose properties are set by calling setup with
+        it. These formats are not shared, callers should keep them.
+        """
+        with self.lock:
+            self.created += 1
+            cell_format = self.workbook().add_format()
+        setup(cell_format)
+        return cell_format
+
+
+_registries = weakref.WeakKeyDictionary()
+_registries_lock = threading.Lock()
+
+
+def get_format_registry(workbook):
+    """Returns the FormatRegistry of workbook, shared by all its users"""
+    with _registries_lock:
+        try:
+            return _registries[workbook]
+        except KeyError:
+            registry = _registries[workbook] = FormatRegistry(workbook)
+            return registry
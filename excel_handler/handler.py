@@ -1,15 +1,39 @@
 """ This document defines the excel_handler module """
 from __future__ import print_function, absolute_import
 from builtins import str, object
+import array
+import asyncio
+import hashlib
+import inspect
+import io
+import os
+import threading
 import xlsxwriter
 import datetime
+from .cache import LRUCache
+from .csv_reader import CSVWorkbook
+from .csv_writer import CSVWriter
+from .dates import get_serial_date_converter
 from .fields import Field
+from .formats import get_format_registry
+from .xml_reader import XMLWorkbook
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from itertools import islice
+from itertools import zip_longest
+from operator import itemgetter
 from future.utils import with_metaclass
 
-from openpyxl.utils.datetime import from_excel
 from openpyxl import load_workbook
+from xlsxwriter.worksheet import Worksheet
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class FieldNotFound(Exception):
@@ -20,8 +44,356 @@ class ReapeatedColumn(Exception):
     pass
 
 
+class RowOrderError(Exception):
+    pass
+
+
 RowError = namedtuple("RowError", "row, row_data, error, field_name")
 
+# marks the missing values of the shorter columns in write_columns
+_missing = object()
+
+ColumnPlan = namedtuple("ColumnPlan", "index, name, cast, default, cast_many")
+
+SheetResult = namedtuple("SheetResult", "data, errors")
+
+# the rows of a sheet rendered by a worker (see ExcelHandler.write_sheet):
+# their sheetData xml, the dimensions of the sheet and its hyperlinks
+RenderedSheet = namedtuple("RenderedSheet", "rows, dimensions, hyperlinks, hlink_count")
+
+# the xlsxwriter internals the rendered sheets rely on, see
+# rendering_supported
+RENDERED_WORKSHEET_ATTRIBUTES = (
+    "_opt_close",
+    "_write_optimized_sheet_data",
+    "_write_rows",
+    "_write_sheet_data",
+    "_write_single_row",
+    "col_info",
+    "dim_colmax",
+    "dim_colmin",
+    "dim_rowmax",
+    "dim_rowmin",
+    "hlink_count",
+    "hyperlinks",
+    "row_data_fh",
+    "row_data_filename",
+)
+
+# the delimiters of the text formats, files of other formats are xlsx files
+CSV_DELIMITERS = {"csv": ",", "tsv": "\t"}
+
+EXECUTORS = {
+    "process": ProcessPoolExecutor,
+    "thread": ThreadPoolExecutor,
+}
+
+# the most threads running the blocking calls of the async api at once
+ASYNC_WORKERS = 4
+_async_executor = None
+_async_executor_lock = threading.Lock()
+
+# the columns of the fields of handlers that bind them by header, by file
+# fingerprint, sheet, header row and handler class
+header_columns_cache = LRUCache(maxsize=256)
+_header_columns_lock = threading.Lock()
+
+# bytes at the end of the xlsx files used to fingerprint them, where the zip
+# central directory, with the checksums of every part of the workbook, is
+# stored, and at the start of csv files, where their header is
+FINGERPRINT_SIZE = 64 * 1024
+
+
+def _normalize_title(title):
+    return str(title).strip().casefold()
+
+
+def file_fingerprint(excel_file, head=False):
+    """
+    Returns a hash that identifies the contents of an xlsx file object. Only
+    the end of the file is hashed: it has the zip central directory, that
+    changes whenever any part of the workbook does.
+
+    With head, the start of the file is hashed instead, as csv files have
+    their header there. Text files are hashed encoded as utf-8.
+    """
+    excel_file.seek(0, io.SEEK_END)
+    size = excel_file.tell()
+    if head:
+        excel_file.seek(0)
+        contents = excel_file.read(FINGERPRINT_SIZE)
+    else:
+        excel_file.seek(max(0, size - FINGERPRINT_SIZE))
+        contents = excel_file.read()
+    if isinstance(contents, str):
+        contents = contents.encode("utf-8")
+
+    digest = hashlib.sha1(str(size).encode())
+    digest.update(contents)
+    return digest.hexdigest()
+
+
+def detect_format(path=None, excel_file=None, sniff=True):
+    """
+    Returns the format of the file given by path or excel_file: "csv" or
+    "tsv" when its name has that extension, "xlsx" when it has another one.
+    With sniff, files without a name or extension are xlsx files when they
+    are zip archives, tsv files when their first line has more tabs than
+    commas and csv files otherwise.
+    """
+    name = path if path is not None else getattr(excel_file, "name", None)
+    if isinstance(name, (str, os.PathLike)):
+        extension = os.path.splitext(name)[1].lower()[1:]
+        if extension:
+            return extension if extension in CSV_DELIMITERS else "xlsx"
+
+    if not sniff:
+        return "xlsx"
+
+    if path is not None:
+        with open(path, "rb") as source:
+            head = source.read(4096)
+    else:
+        position = excel_file.tell()
+        head = excel_file.read(4096)
+        excel_file.seek(position)
+        if isinstance(head, str):
+            head = head.encode("utf-8")
+
+    if head.startswith(b"PK"):
+        return "xlsx"
+
+    first_line = head.split(b"\n", 1)[0]
+    if first_line.count(b"\t") > first_line.count(b","):
+        return "tsv"
+    return "csv"
+
+
+def _constant(value):
+    return lambda: value
+
+
+def _defining_class(field, name):
+    """Returns the class in the mro of field that defines the attribute name"""
+    for cls in type(field).__mro__:
+        if name in vars(cls):
+            return cls
+
+
+def compile_column_plan(fields):
+    """
+    Returns a tuple of ColumnPlan entries, one per field, with everything the
+    read loop needs from the field: the position of its value in the row, the
+    field name, the caster, a factory for the default value (None
+    when the field has no default) and the cast_many method of vectorized
+    fields (None for the fields cast one cell at a time)
+    """
+    plan = []
+    for index, field in enumerate(fields):
+        if hasattr(field, "default"):
+            default = field.default
+            if not callable(default):
+                default = _constant(default)
+        else:
+            default = None
+
+        cast_many = None
+        if field.vectorized and issubclass(
+            _defining_class(field, "cast_many"), _defining_class(field, "cast")
+        ):
+            cast_many = field.cast_many
+
+        plan.append(
+            ColumnPlan(index, field.name, field.get_caster(), default, cast_many)
+        )
+
+    return tuple(plan)
+
+
+class Record(object):
+    """Base class of the __slots__ records returned by read_rows"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __iter__(self):
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return "{}({})".format(
+            self.__class__.__name__,
+            ", ".join("{}={!r}".format(k, v) for k, v in self._asdict().items()),
+        )
+
+    def _asdict(self):
+        return dict(zip(self.__slots__, self))
+
+
+def row_factory(column_names, row_type=dict):
+    """
+    Returns a callable that builds a row of row_type from a tuple of values.
+
+    row_type can be dict, tuple, "namedtuple" or "record" (a generated class
+    with __slots__). The tuple, namedtuple and record types avoid allocating
+    one dict per row.
+    """
+    column_names = tuple(column_names)
+
+    if row_type is dict:
+        return lambda values: dict(zip(column_names, values))
+
+    if row_type is tuple:
+        return tuple
+
+    if row_type == "namedtuple":
+        return namedtuple("Row", column_names, rename=True)._make
+
+    if row_type == "record":
+        for name in column_names:
+            if not str(name).isidentifier():
+                raise ValueError("{!r} is not a valid record field".format(name))
+        record_cls = type("Row", (Record,), {"__slots__": column_names})
+        return lambda values: record_cls(*values)
+
+    raise ValueError("Unknown row_type {!r}".format(row_type))
+
+
+def _open_source(handler_cls, source, backend="openpyxl", format=None):
+    """Opens a read only handler of handler_cls for a path or file contents"""
+    if isinstance(source, bytes):
+        return handler_cls(
+            excel_file=io.BytesIO(source),
+            on_demand=True,
+            backend=backend,
+            format=format,
+        )
+    return handler_cls(path=source, on_demand=True, backend=backend, format=format)
+
+
+def _read_sheet(
+    handler_cls, source, sheet_name, read_kwargs, backend="openpyxl", format=None
+):
+    """Reads a sheet with its own handler, used by the read_all_sheets workers"""
+    with _open_source(handler_cls, source, backend, format) as handler:
+        handler.set_sheet_by_name(sheet_name)
+        data, errors = handler.read(return_errors=True, **read_kwargs)
+
+    return sheet_name, SheetResult(data, errors)
+
+
+def get_async_executor():
+    """
+    Returns the thread pool, of ASYNC_WORKERS threads, that runs the blocking
+    calls of the async api of every handler
+    """
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(
+                max_workers=ASYNC_WORKERS, thread_name_prefix="excel_handler"
+            )
+        return _async_executor
+
+
+def _close_opened(future):
+    """Closes the handler opened by a cancelled aopen"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _render_sheet(handler_cls, sheet_name, data, set_titles, xf_indices):
+    """
+    Writes data in a sheet of its own handler and returns its RenderedSheet,
+    used by the save workers. Returns None when the rows use formats missing
+    from xf_indices, the xf indices of the formats of the saved workbook.
+    """
+    # constant_memory sheets write strings inline, so the rows do not depend
+    # on the shared strings of the workbook, and flush them to a file
+    handler = handler_cls(excel_file=io.BytesIO(), mode="w", constant_memory=True)
+    handler.workbook.xf_format_indices.update(xf_indices)
+    handler.add_sheet(sheet_name)
+    handler.write(data, set_titles=set_titles)
+
+    sheet = handler.sheet
+    sheet._write_single_row()
+    sheet.row_data_fh.seek(0)
+    rows = sheet.row_data_fh.read()
+    sheet._opt_close()
+    os.unlink(sheet.row_data_filename)
+
+    if len(handler.workbook.xf_format_indices) > len(xf_indices):
+        return None
+
+    return RenderedSheet(
+        rows,
+        (sheet.dim_rowmin, sheet.dim_rowmax, sheet.dim_colmin, sheet.dim_colmax),
+        dict((row, dict(links)) for row, links in sheet.hyperlinks.items()),
+        sheet.hlink_count,
+    )
+
+
+def rendering_supported(workbook):
+    """
+    Returns whether the xlsxwriter workbook has the internals used to render
+    its sheets in workers, as XlsxWriter 3.0.6 and later do. Otherwise
+    write_sheet writes the rows right away.
+    """
+    global _rendering_supported
+    if _rendering_supported is None:
+        worksheet = Worksheet()
+        _rendering_supported = (
+            all(hasattr(worksheet, name) for name in RENDERED_WORKSHEET_ATTRIBUTES)
+            and "worksheet_class"
+            in inspect.signature(workbook.add_worksheet).parameters
+        )
+    return _rendering_supported and hasattr(workbook, "xf_format_indices")
+
+
+_rendering_supported = None
+
+
+class RenderedWorksheet(Worksheet):
+    """
+    xlsxwriter worksheet whose rows can be rendered by a worker, see
+    ExcelHandler.write_sheet
+    """
+
+    def __init__(self):
+        super(RenderedWorksheet, self).__init__()
+        self.rendered_rows = None
+
+    def set_rendered(self, rendered):
+        """Uses the rows, dimensions and hyperlinks of a RenderedSheet"""
+        (
+            self.dim_rowmin,
+            self.dim_rowmax,
+            self.dim_colmin,
+            self.dim_colmax,
+        ) = rendered.dimensions
+        for row, links in rendered.hyperlinks.items():
+            self.hyperlinks[row].update(links)
+        self.hlink_count += rendered.hlink_count
+        self.rendered_rows = rendered.rows
+
+    def _write_rows(self):
+        if self.rendered_rows is None:
+            return super(RenderedWorksheet, self)._write_rows()
+        self.fh.write(self.rendered_rows)
+
+    def _write_optimized_sheet_data(self):
+        if self.rendered_rows is None:
+            return super(RenderedWorksheet, self)._write_optimized_sheet_data()
+        self.row_data_fh.close()
+        os.unlink(self.row_data_filename)
+        self._write_sheet_data()
+
 
 class ExcelHandlerMetaClass(type):
     def __new__(cls, name, bases, attrs):
@@ -70,6 +442,8 @@ class ExcelHandlerMetaClass(type):
             except:
                 pass
 
+        this.column_plan = compile_column_plan(this.fields)
+
         return this
 
 
@@ -77,37 +451,190 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
     """ExcelHandler is a class that is used to wrap common operations in
     excel files"""
 
-    def __init__(self, path=None, excel_file=None, mode="r", on_demand=False):
+    # number of rows whose values are given to the field prefetchers at once,
+    # when reading and writing
+    read_chunk_size = 1000
+
+    # when True, fields are read from the columns whose title in header_row
+    # is their verbose_name or one of their aliases, instead of from col
+    bind_by_header = False
+    header_row = 1
+
+    # the encoding of csv and tsv files
+    csv_encoding = "utf-8"
+
+    def __init__(
+        self,
+        path=None,
+        excel_file=None,
+        mode="r",
+        on_demand=False,
+        constant_memory=False,
+        backend="openpyxl",
+        format=None,
+    ):
+        """
+        Opens the excel file given by path or excel_file.
+
+        When on_demand is True and the file is opened for reading, the
+        workbook is loaded in openpyxl's read-only mode: sheets are parsed
+        lazily while iterating rows instead of being loaded into memory, so
+        reading large sheets uses a constant amount of memory. Call close()
+        (or use the handler as a context manager) to release the file.
+
+        backend selects how files are read: "openpyxl" or "xml", which parses
+        the sheets directly without creating cell objects and only reads the
+        values of the columns that are read (see xml_reader.XMLWorkbook). The
+        xml backend always reads sheets lazily, as on_demand does.
+
+        When constant_memory is True and the file is opened for writing, the
+        workbook is created with xlsxwriter's constant_memory option, which
+        flushes each row to disk as soon as a later row is written. Rows must
+        then be written in order: writing a row before the last written row
+        of the sheet raises RowOrderError.
+
+        format is "xlsx", "csv" or "tsv", detected from the name or contents
+        of the file when it is not given (see detect_format). csv and tsv
+        files have a single sheet, are read with the csv module as the rows
+        are iterated, with blank cells as None, and are written as a stream,
+        so rows must be written in order as in constant_memory mode.
+        """
         if path is None and excel_file is None:
             raise Exception("path or excel_file requried")
         if path is not None and excel_file is not None:
             raise Exception("Only specify path or excel_file, not both")
+
+        if backend not in ("openpyxl", "xml"):
+            raise ValueError("Unknown backend {!r}".format(backend))
+
+        if format is None:
+            format = detect_format(path, excel_file, sniff=mode == "r")
+        if format != "xlsx" and format not in CSV_DELIMITERS:
+            raise ValueError("Unknown format {!r}".format(format))
+
+        self.mode = mode
+        self.on_demand = on_demand
+        self.constant_memory = constant_memory
+        self.backend = backend
+        self.format = format
+
         if mode == "r":
-            if path:
+            self.path = path
+            self.excel_file = excel_file
+
+            if format in CSV_DELIMITERS:
+                self.workbook = CSVWorkbook(
+                    path or excel_file,
+                    delimiter=CSV_DELIMITERS[format],
+                    encoding=self.csv_encoding,
+                )
+            elif backend == "xml":
+                self.workbook = XMLWorkbook(path or excel_file)
+            elif path:
                 self.workbook = load_workbook(
                     filename=path,
+                    read_only=on_demand,
                 )
             else:
                 self.workbook = load_workbook(
                     filename=excel_file,
+                    read_only=on_demand,
                 )
             self.sheet = self.workbook.worksheets[0]
 
         else:
             self.path = path
 
-            self.workbook = xlsxwriter.Workbook(self.path, {"nan_inf_to_errors": True})
+            if format in CSV_DELIMITERS:
+                self.workbook = CSVWriter(
+                    path or excel_file,
+                    delimiter=CSV_DELIMITERS[format],
+                    encoding=self.csv_encoding,
+                )
+            else:
+                self.workbook = xlsxwriter.Workbook(
+                    path or excel_file,
+                    {
+                        "nan_inf_to_errors": True,
+                        "constant_memory": constant_memory,
+                    },
+                )
+            self._last_rows = {}
+            self._rendered_sheets = []
 
+            # formats are created once per workbook through the registry, see
+            # get_title_format
+            self.formats = get_format_registry(self.workbook)
+            self._title_format = None
             self.set_default_formats()
 
         self.parser = None
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Releases the underlying workbook.
+
+        Read handlers close the file handles kept open by on_demand mode,
+        write handlers save the document unless it was already saved.
+        """
+        if self.mode == "r":
+            self.workbook.close()
+        elif not self.workbook.fileclosed:
+            self.save()
+
+    @classmethod
+    async def aopen(cls, *args, **kwargs):
+        """
+        Async counterpart of creating a handler: the file is opened in the
+        async executor (see get_async_executor). The handler is closed if the
+        awaiting task is cancelled.
+        """
+        future = get_async_executor().submit(cls, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(_close_opened)
+            raise
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        """Async counterpart of close"""
+        await self.run_blocking(self.close)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) in the async executor and returns its
+        result. Calls can not be interrupted: when the awaiting task is
+        cancelled, the handler is closed once func returns.
+        """
+        future = get_async_executor().submit(func, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(self._close_cancelled)
+            raise
+
+    def _close_cancelled(self, future):
+        if future.cancelled():
+            # the call never started and this runs in the event loop
+            get_async_executor().submit(self.close)
+        else:
+            self.close()
+
     def set_default_formats(self):
-        self.date_format = self.workbook.add_format({"num_format": "YYYY-MM-DD"})
-        self.datetime_format = self.workbook.add_format(
-            {"num_format": "YYYY-MM-DD HH:MM:SS"}
-        )
-        self.time_format = self.workbook.add_format({"num_format": "HH:MM:SS"})
+        self.date_format = self.formats.get({"num_format": "YYYY-MM-DD"})
+        self.datetime_format = self.formats.get({"num_format": "YYYY-MM-DD HH:MM:SS"})
+        self.time_format = self.formats.get({"num_format": "HH:MM:SS"})
 
     def set_row_formats_from_example(self, row):
         i = 0
@@ -124,6 +651,23 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
 
         self.sheet = self.workbook.add_worksheet(name)
 
+    def check_row_order(self, row):
+        """
+        In constant memory mode, and when writing csv files, raises
+        RowOrderError if row comes before the last row written in the current
+        sheet, since that row has already been flushed to disk
+        """
+        if not self.constant_memory and self.format not in CSV_DELIMITERS:
+            return
+
+        last_row = self._last_rows.get(self.sheet.name, 0)
+        if row < last_row:
+            raise RowOrderError(
+                "Cannot write row {} of sheet {} after row {} in constant memory "
+                "mode".format(row, self.sheet.name, last_row)
+            )
+        self._last_rows[self.sheet.name] = row
+
     def set_sheet(self, sheet_index):
         """sets the current sheet with the given sheet_index"""
         self.sheet = self.workbook.worksheets[sheet_index]
@@ -132,32 +676,55 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
         """sets the current sheet with the given sheet name"""
         self.sheet = self.workbook[sheet_name]
 
-    def parse_date(self, value):
-        return from_excel(value).date()
+    def get_source(self):
+        """
+        Returns what workers need to open their own copy of the file: its path,
+        or the contents of excel_file, as bytes (encoded with csv_encoding
+        when excel_file is a text file)
+        """
+        if self.path:
+            return self.path
 
-    def read_rows(self, column_structure, starting_row=1, max_rows=None):
-        """Reads the current sheet from the starting row to the last row or up
-        to a max of max_rows if greater than 0
+        self.excel_file.seek(0)
+        source = self.excel_file.read()
+        if isinstance(source, str):
+            source = source.encode(self.csv_encoding)
+        return source
 
-        returns an array with the data
+    def parse_date(self, value):
+        return get_serial_date_converter(self.workbook).to_date(value)
+
+    def iter_read_rows(
+        self, column_structure, starting_row=1, max_rows=None, row_type=dict
+    ):
+        """Iterator version of read_rows, yields the rows one at a time"""
+        make_row = row_factory(column_structure, row_type)
 
-        """
-        data = []
         rows = self.sheet.iter_rows(
             min_row=starting_row,
             max_row=max_rows,
             max_col=len(column_structure),
+            values_only=True,
         )
 
-        for row in rows:
-            column_data = {}
-            for cell in row:
-                value = cell.value
-                column_name = list(column_structure)[cell.col_idx - 1]
-                column_data[column_name] = value
-            data.append(column_data)
+        return map(make_row, rows)
 
-        return data
+    def read_rows(self, column_structure, starting_row=1, max_rows=None, row_type=dict):
+        """Reads the current sheet from the starting row to the last row or up
+        to a max of max_rows if greater than 0
+
+        returns an array with the data, with one row_type object per row (see
+        row_factory)
+
+        """
+        return list(
+            self.iter_read_rows(
+                column_structure,
+                starting_row=starting_row,
+                max_rows=max_rows,
+                row_type=row_type,
+            )
+        )
 
     def _read(
         self,
@@ -252,7 +819,164 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
             return data, errors
         return data
 
-    def read(
+    def get_file_fingerprint(self):
+        """Returns the file_fingerprint of the file being read"""
+        if getattr(self, "_fingerprint", None) is None:
+            head = self.format in CSV_DELIMITERS
+            if self.path:
+                with open(self.path, "rb") as excel_file:
+                    self._fingerprint = file_fingerprint(excel_file, head=head)
+            else:
+                self._fingerprint = file_fingerprint(self.excel_file, head=head)
+        return self._fingerprint
+
+    def get_field_columns(self):
+        """
+        Returns the columns of self.fields in the current sheet: their col, or
+        the columns bound by header when bind_by_header is set. Header
+        columns are resolved once per file and sheet and kept in
+        header_columns_cache.
+        """
+        if not self.bind_by_header:
+            return [field.col for field in self.fields]
+
+        key = (
+            self.get_file_fingerprint(),
+            self.sheet.title,
+            self.header_row,
+            type(self),
+        )
+        with _header_columns_lock:
+            columns = header_columns_cache.get(key)
+
+        if columns is None:
+            columns = self.resolve_header_columns()
+            with _header_columns_lock:
+                header_columns_cache[key] = columns
+
+        return list(columns)
+
+    def resolve_header_columns(self):
+        """
+        Returns the columns of self.fields whose title in header_row is the
+        verbose_name or one of the aliases of the field, ignoring case and
+        surrounding whitespace. Raises FieldNotFound when a field has no
+        column.
+        """
+        rows = self.sheet.iter_rows(
+            min_row=self.header_row, max_row=self.header_row, values_only=True
+        )
+
+        title_columns = {}
+        for column, title in enumerate(next(rows, ())):
+            if title is not None:
+                title_columns.setdefault(_normalize_title(title), column)
+
+        columns = []
+        bound = {}
+        for field in self.fields:
+            for title in (field.verbose_name,) + field.aliases:
+                column = title_columns.get(_normalize_title(title))
+                if column is not None:
+                    break
+            else:
+                raise FieldNotFound(
+                    "No column of sheet {} is titled {!r}".format(
+                        self.sheet.title, field.verbose_name
+                    )
+                )
+
+            if column in bound:
+                raise ReapeatedColumn(
+                    "{} collides with field {} on column {}".format(
+                        field.name, bound[column].name, column
+                    )
+                )
+            bound[column] = field
+            columns.append(column)
+
+        return tuple(columns)
+
+    def iter_field_rows(self, min_row=1, max_row=None):
+        """
+        Yields a tuple with the values of the columns of the fields of each row
+        of the current sheet, in the order of self.fields. Only the window
+        of columns between the first and the last field column is fetched,
+        and the xml and csv backends skip the columns in between too.
+        """
+        columns = [column + 1 for column in self.get_field_columns()]
+        if not columns:
+            return self.sheet.iter_rows(
+                min_row=min_row, max_row=max_row, max_col=0, values_only=True
+            )
+
+        if self.backend == "xml" or self.format in CSV_DELIMITERS:
+            return self.sheet.iter_rows(
+                min_row=min_row, max_row=max_row, columns=columns, values_only=True
+            )
+
+        min_col = min(columns)
+        rows = self.sheet.iter_rows(
+            min_row=min_row,
+            max_row=max_row,
+            min_col=min_col,
+            max_col=max(columns),
+            values_only=True,
+        )
+
+        offsets = [column - min_col for column in columns]
+        if offsets == list(range(len(offsets))):
+            # contiguous columns, the rows already are in the order of fields
+            return rows
+        if len(offsets) == 1:
+            offset = offsets[0]
+            return map(lambda row: (row[offset],), rows)
+        return map(itemgetter(*offsets), rows)
+
+    def iter_chunks(self, min_row=1, max_row=None):
+        """
+        Yields lists of up to read_chunk_size rows with the values of the
+        field columns of the current sheet, after giving the values of each
+        chunk to the field prefetchers
+        """
+        rows = self.iter_field_rows(min_row=min_row, max_row=max_row)
+
+        prefetchers = []
+        for index, field in enumerate(self.fields):
+            prefetch = field.get_prefetcher()
+            if prefetch is not None:
+                prefetchers.append((index, prefetch))
+
+        while True:
+            chunk = list(islice(rows, self.read_chunk_size))
+            if not chunk:
+                return
+
+            for index, prefetch in prefetchers:
+                prefetch([row[index] for row in chunk])
+
+            yield chunk
+
+    def iter_values(self, min_row=1, max_row=None):
+        """
+        Yields the values of the field columns of each row of the current
+        sheet, read in chunks (see iter_chunks)
+        """
+        for chunk in self.iter_chunks(min_row=min_row, max_row=max_row):
+            yield from chunk
+
+    def cast_column(self, column, values):
+        """
+        Casts the values of a vectorized column in a chunk of rows with
+        cast_many. Returns the cast values and a dict of errors by position.
+        Blank cells of fields with a default are not cast.
+        """
+        values, errors = column.cast_many(
+            values, self.workbook, skip_none=column.default is not None
+        )
+        return values, dict(errors)
+
+    def iter_read(
         self,
         skip_titles=False,
         failfast=False,
@@ -260,14 +984,15 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
         include_rowx=False,
         return_errors=False,
         starting_row=1,
+        max_row=None,
     ):
         """
-        Using the structure defined with the Field attributes, reads the excel
-        and returns the data in an array of dicts
-        """
-        data = []
-        errors = []
+        Generator version of read: yields the rows as they are read instead
+        of building a list, so the rows can be processed in constant memory.
 
+        When return_errors is True, yields (row_data, error) pairs, where
+        error is None for valid rows and row_data is None for invalid ones.
+        """
         min_row = 1
         if skip_titles:
             min_row += 1
@@ -279,91 +1004,504 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
         for field in self.fields:
             field.prepare_read()
 
-        for row in self.sheet.iter_rows(min_row=min_row):
-            row_data = {}
-            empty_fields = []
-            has_errors = False
+        plan = self.column_plan
+        vectorized = [column for column in plan if column.cast_many is not None]
+        workbook = self.workbook
+
+        row_number = min_row
+        for chunk in self.iter_chunks(min_row=min_row, max_row=max_row):
+            # the cast values of the vectorized columns, in the order of the
+            # plan, and their errors by row
+            columns = [None] * len(plan)
+            chunk_errors = {}
+            if vectorized:
+                chunk_columns = list(zip(*chunk))
+
+            for column in vectorized:
+                values, errors = self.cast_column(column, chunk_columns[column.index])
+                columns[column.index] = values
+                for y, cast_error in errors.items():
+                    chunk_errors.setdefault(y, {})[column.index] = cast_error
+
+            for y, row in enumerate(chunk):
+                row_data = {}
+                blank_row = True
+                error = None
+                row_errors = chunk_errors.get(y)
+
+                for (index, name, cast, default, cast_many), values in zip(
+                    plan, columns
+                ):
+                    value = row[index]
+
+                    if value is None:
+                        if default is not None:
+                            row_data[name] = default()
+                            continue
+                    else:
+                        blank_row = False
 
-            for cell in row:
-                value = cell.value
+                    if values is None:
+                        try:
+                            row_data[name] = cast(value, workbook, row_data)
+                            continue
+                        except Exception as err:
+                            cast_error = err
+                    elif row_errors is None or index not in row_errors:
+                        row_data[name] = values[y]
+                        continue
+                    else:
+                        cast_error = row_errors[index]
 
-                try:
-                    # get fields by column
-                    field = self.fields[cell.column - 1]
-                except Exception:
+                    if failfast:
+                        raise cast_error
+                    error = self.row_error(row_number + y, row_data, name, cast_error)
                     break
 
-                if value is None:
-                    empty_fields.append(value)
+                if error is not None:
+                    if return_errors:
+                        yield None, error
+                    continue
 
-                if value is None and hasattr(field, "default"):
-                    default_value = field.default
-                    if callable(default_value):
-                        value = default_value()
-                    else:
-                        value = default_value
+                if ignore_blank_rows and blank_row:
+                    continue
+
+                if return_errors:
+                    yield row_data, None
                 else:
-                    try:
-                        value = field.cast(
-                            value,
-                            self.workbook,
-                            row_data,
-                        )
-                    except Exception as err:
-                        has_errors = True
-                        if failfast:
-                            raise
-                        if return_errors:
-                            row_number = 0
-                            if len(row) > 0:
-                                row_number = row[0].row
-                            msg = f'Cannot read row "{row_number}" : Column {str(field.verbose_name)}, {err.args[0]}'
-                            errors.append(
-                                RowError(
-                                    row=row,
-                                    row_data=row_data,
-                                    error=msg,
-                                    field_name=field.name,
-                                )
-                            )
-                        break
+                    yield row_data
+
+            row_number += len(chunk)
+
+    def row_error(self, row_number, row_data, field_name, err):
+        """Returns the RowError of a value of field_name that could not be cast"""
+        if not err.args:
+            err.args = ("",)
+        field = self.fieldname_to_field[field_name]
+        msg = f'Cannot read row "{row_number}" : Column {str(field.verbose_name)}, {err.args[0]}'
+        return RowError(
+            row=row_number,
+            row_data=row_data,
+            error=msg,
+            field_name=field_name,
+        )
 
-                row_data[field.name] = value
+    def read(
+        self,
+        skip_titles=False,
+        failfast=False,
+        ignore_blank_rows=True,
+        include_rowx=False,
+        return_errors=False,
+        starting_row=1,
+        max_row=None,
+    ):
+        """
+        Using the structure defined with the Field attributes, reads the excel
+        and returns the data in an array of dicts
+        """
+        rows = self.iter_read(
+            skip_titles=skip_titles,
+            failfast=failfast,
+            ignore_blank_rows=ignore_blank_rows,
+            include_rowx=include_rowx,
+            return_errors=return_errors,
+            starting_row=starting_row,
+            max_row=max_row,
+        )
 
-            if has_errors:
-                continue
+        if not return_errors:
+            return list(rows)
 
-            if ignore_blank_rows:
-                if not len(empty_fields) == len(row_data):
-                    data.append(row_data)
-            else:
+        data = []
+        errors = []
+        for row_data, error in rows:
+            if error is None:
                 data.append(row_data)
+            else:
+                errors.append(error)
+
+        return data, errors
+
+    async def aread(self, *args, **kwargs):
+        """Async counterpart of read, see run_blocking"""
+        return await self.run_blocking(self.read, *args, **kwargs)
+
+    async def aiter_read(self, *args, **kwargs):
+        """
+        Async counterpart of iter_read. The rows are read in chunks of
+        read_chunk_size in the async executor, the next chunk being read
+        while the rows of the current one are consumed, so the rows read
+        ahead of the consumer are at most one chunk.
+        """
+        rows = self.iter_read(*args, **kwargs)
+        size = self.read_chunk_size
+
+        def read_chunk():
+            return list(islice(rows, size))
+
+        pending = asyncio.ensure_future(self.run_blocking(read_chunk))
+        try:
+            while True:
+                chunk = await pending
+                if not chunk:
+                    return
+
+                pending = asyncio.ensure_future(self.run_blocking(read_chunk))
+                for row in chunk:
+                    yield row
+        finally:
+            if not pending.done():
+                # the consumer stopped early: wait for the chunk read ahead,
+                # so the handler is no longer in use once the rows are closed
+                await asyncio.wait([pending])
+                if not pending.cancelled():
+                    pending.exception()
+
+    def iter_read_all_sheets(
+        self, workers=None, executor="process", sheet_names=None, **kwargs
+    ):
+        """
+        Reads the sheets given by sheet_names (all the sheets by default)
+        concurrently, each worker opening the file on its own in on_demand
+        mode. executor is "process" or "thread", and kwargs are passed to
+        read.
+
+        Yields (sheet_name, SheetResult) pairs as the sheets are read, where
+        SheetResult holds the data and the errors of the sheet.
+        """
+        if sheet_names is None:
+            sheet_names = self.workbook.sheetnames
+
+        # the errors are always returned, in the SheetResult of each sheet
+        kwargs.pop("return_errors", None)
+
+        source = self.get_source()
+        handler_cls = type(self)
+
+        with EXECUTORS[executor](max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _read_sheet,
+                    handler_cls,
+                    source,
+                    sheet_name,
+                    kwargs,
+                    self.backend,
+                    self.format,
+                )
+                for sheet_name in sheet_names
+            ]
+
+            for future in as_completed(futures):
+                yield future.result()
+
+    def read_all_sheets(
+        self, workers=None, executor="process", sheet_names=None, **kwargs
+    ):
+        """
+        Reads the sheets concurrently (see iter_read_all_sheets) and returns
+        a dict of SheetResult by sheet name, in the order of the sheets
+        """
+        if sheet_names is None:
+            sheet_names = self.workbook.sheetnames
+
+        results = dict(
+            self.iter_read_all_sheets(
+                workers=workers, executor=executor, sheet_names=sheet_names, **kwargs
+            )
+        )
+
+        return {sheet_name: results[sheet_name] for sheet_name in sheet_names}
+
+    def read_partitioned(
+        self,
+        workers=None,
+        chunk_size=None,
+        executor="process",
+        skip_titles=False,
+        return_errors=False,
+        starting_row=1,
+        **kwargs,
+    ):
+        """
+        Reads the current sheet concurrently, splitting it in ranges of
+        chunk_size rows that are read by workers opening the file on their own
+        in on_demand mode. executor is "process" or "thread", and kwargs are
+        passed to read.
+
+        Sheets can only be parsed from their start, so each worker parses
+        every row before its range too, and the rows parsed grow with the
+        square of the number of ranges. By default the sheet is split in one
+        range per worker (workers, or the number of cpus), which keeps them
+        to about (workers + 1) / 2 times the rows of the sheet, while casting
+        the rows is split evenly (see benchmarks/read_partitioned.py).
+
+        Returns the same as read, with the rows in the order of the sheet.
+        """
+        min_row = 1
+        if skip_titles:
+            min_row += 1
+
+        if not starting_row == 1:
+            min_row = starting_row
+
+        max_row = self.sheet.max_row
+        if max_row is None:
+            # read only sheets without dimensions
+            self.sheet.calculate_dimension(force=True)
+            max_row = self.sheet.max_row
+
+        if chunk_size is None:
+            partitions = workers or os.cpu_count() or 1
+            chunk_size = max(1, -(-(max_row + 1 - min_row) // partitions))
+
+        source = self.get_source()
+        handler_cls = type(self)
+        sheet_name = self.sheet.title
+
+        data = []
+        errors = []
+
+        first_rows = list(range(min_row, max_row + 1, chunk_size)) or [min_row]
+
+        with EXECUTORS[executor](max_workers=workers) as pool:
+            futures = []
+            for first_row in first_rows:
+                last_row = first_row + chunk_size - 1
+                if first_row == first_rows[-1]:
+                    # the dimension declared by the file may be stale, the
+                    # last range is read up to the end of the sheet
+                    last_row = None
+                read_kwargs = dict(kwargs, starting_row=first_row, max_row=last_row)
+                futures.append(
+                    pool.submit(
+                        _read_sheet,
+                        handler_cls,
+                        source,
+                        sheet_name,
+                        read_kwargs,
+                        self.backend,
+                        self.format,
+                    )
+                )
+
+            for future in futures:
+                sheet_name, result = future.result()
+                data.extend(result.data)
+                errors.extend(result.errors)
 
         if return_errors:
             return data, errors
         return data
 
-    def save(self):
-        """Save document"""
+    def read_columns(self, skip_titles=False, ignore_blank_rows=True, starting_row=1):
+        """
+        Using the structure defined with the Field attributes, reads the excel
+        in a single pass into one column per field instead of one dict per
+        row.
+
+        Returns a (columns, masks) tuple of dicts keyed by field name. Integer
+        and float fields are read into array.array columns, the other fields
+        into lists. When numpy is installed, every column except the ones of
+        text fields is returned as a numpy array, using datetime64 for dates
+        and bool for booleans.
+
+        Each mask holds one flag per row that is false where the cell was
+        blank or could not be cast, including the cells of date and boolean
+        fields cast to other types, as text is. Blank cells take the field
+        default when the field has one; cells that cannot be cast take 0 on
+        integer columns, nan on float columns and None elsewhere.
+        """
+        min_row = 1
+        if skip_titles:
+            min_row += 1
+
+        if not starting_row == 1:
+            min_row = starting_row
+
+        for field in self.fields:
+            field.prepare_read()
+
+        plan = self.column_plan
+        workbook = self.workbook
+
+        columns = []
+        masks = []
+        fill_values = []
+        value_types = [
+            field.numpy_types if field.numpy_dtype else None for field in self.fields
+        ]
+        for field in self.fields:
+            typecode = field.array_typecode
+            if typecode:
+                columns.append(array.array(typecode))
+                fill_values.append(float("nan") if typecode == "d" else 0)
+            else:
+                columns.append([])
+                fill_values.append(None)
+            masks.append(bytearray())
+
+        rows = self.iter_values(min_row=min_row)
+
+        for row in rows:
+            if ignore_blank_rows and row.count(None) == len(row):
+                continue
+
+            row_data = {}
+            for (
+                (index, name, cast, default, cast_many),
+                column,
+                mask,
+                fill,
+                types,
+            ) in zip(plan, columns, masks, fill_values, value_types):
+                value = row[index]
+                valid = True
+
+                if value is None:
+                    valid = False
+                    if default is not None:
+                        value = default()
+                else:
+                    try:
+                        value = cast(value, workbook, row_data)
+                    except Exception:
+                        value = fill
+                        valid = False
+
+                if value is None or (
+                    types is not None and not isinstance(value, types)
+                ):
+                    value = fill
+                    valid = False
+
+                try:
+                    column.append(value)
+                except (TypeError, OverflowError):
+                    column.append(fill)
+                    valid = False
+
+                row_data[name] = value
+                mask.append(valid)
+
+        if numpy is not None:
+            for x, field in enumerate(self.fields):
+                column = columns[x]
+                if isinstance(column, array.array):
+                    columns[x] = numpy.frombuffer(column, dtype=column.typecode)
+                elif field.numpy_dtype:
+                    columns[x] = numpy.array(column, dtype=field.numpy_dtype)
+            masks = [numpy.frombuffer(mask, dtype=bool) for mask in masks]
+
+        names = [column.name for column in plan]
+        return dict(zip(names, columns)), dict(zip(names, masks))
+
+    def save(self, workers=None, executor="process"):
+        """
+        Save document. The sheets added with write_sheet are rendered first
+        by workers, see render_sheets.
+        """
+        if self._rendered_sheets:
+            self.render_sheets(workers=workers, executor=executor)
 
         # xlwt save
         # self.workbook.save(self.path)
         self.workbook.close()
 
+    async def asave(self, workers=None, executor="process"):
+        """Async counterpart of save, see run_blocking"""
+        await self.run_blocking(self.save, workers=workers, executor=executor)
+
+    def write_sheet(self, name, data, set_titles=False):
+        """
+        Adds a sheet named name and writes data in it like write, except the
+        rows are rendered concurrently with the rows of the other sheets added
+        with write_sheet, by workers with their own handler, when the document
+        is saved. The widths and formats of the columns are set right away.
+
+        data is kept until then, and sent to the workers when they are
+        processes, so it must be a picklable list of dicts. csv and tsv files,
+        and xlsx files when the installed xlsxwriter cannot render sheets (see
+        rendering_supported), are written right away instead.
+        """
+        if self.format in CSV_DELIMITERS or not rendering_supported(self.workbook):
+            self.add_sheet(name)
+            self.write(data, set_titles=set_titles)
+            return
+
+        self.sheet = self.workbook.add_worksheet(
+            name, worksheet_class=RenderedWorksheet
+        )
+        for field in self.fieldname_to_field.values():
+            field.set_column_format(self)
+        if set_titles:
+            self.get_title_format()
+
+        self._rendered_sheets.append((self.sheet, list(data), set_titles))
+
+    def render_sheets(self, workers=None, executor="process"):
+        """
+        Renders the rows of the sheets added with write_sheet, each in a
+        worker. executor is "process" or "thread".
+
+        Strings are written inline in the rows, and the formats used keep the
+        xf index they have in this workbook, so the rendered rows are added
+        to the sheets as they are. Sheets whose rows use formats this
+        workbook does not have yet are written here instead.
+        """
+        rendered_sheets, self._rendered_sheets = self._rendered_sheets, []
+
+        # assign the xf indices of every format the rows may use
+        cell_formats = [self.workbook.default_url_format, self._title_format]
+        cell_formats.append(self.workbook.default_date_format)
+        for sheet, data, set_titles in rendered_sheets:
+            cell_formats.extend(col_info[1] for col_info in sheet.col_info.values())
+        for cell_format in cell_formats:
+            if cell_format is not None:
+                cell_format._get_xf_index()
+        xf_indices = dict(self.workbook.xf_format_indices)
+
+        handler_cls = type(self)
+
+        with EXECUTORS[executor](max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _render_sheet, handler_cls, sheet.name, data, set_titles, xf_indices
+                )
+                for sheet, data, set_titles in rendered_sheets
+            ]
+
+            for (sheet, data, set_titles), future in zip(rendered_sheets, futures):
+                rendered = future.result()
+                if rendered is None:
+                    self.sheet = sheet
+                    self.write(data, set_titles=set_titles)
+                else:
+                    sheet.set_rendered(rendered)
+
     def set_title_format(self, formt):
         pass
 
+    def get_title_format(self):
+        """
+        Returns the format of the titles, created once per handler with
+        set_title_format
+        """
+        if self._title_format is None:
+            self._title_format = self.formats.create(self.set_title_format)
+        return self._title_format
+
     def set_row_format(self):
         return None
 
     def write_rows(self, rows, col_offset=0, row_offset=0, set_titles=False):
         """Write rows in the current sheet"""
 
-        title_formt = self.workbook.add_format()
         row_formt = self.set_row_format()
 
         if set_titles:
-            self.set_title_format(title_formt)
+            title_formt = self.get_title_format()
         else:
             title_formt = row_formt
 
@@ -375,6 +1513,7 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
                 formt = row_formt
 
             row_y = row_offset + y
+            self.check_row_order(row_y)
 
             for x, value in enumerate(row):
                 row_x = col_offset + x
@@ -382,48 +1521,138 @@ class ExcelHandler(with_metaclass(ExcelHandlerMetaClass, object)):
                 self.sheet.write(row_y, row_x, value, formt)
 
     def write_columns(self, columns, row_offset=0, col_offset=0, set_titles=False):
-        """Write columns in the current sheet"""
+        """
+        Write columns in the current sheet.
+
+        columns is an iterable of columns, that can be lists, generators or
+        numpy arrays of different lengths. They are transposed in windows of
+        read_chunk_size rows, which are written row by row, so only one
+        window of each column is kept in memory and the rows are written in
+        order, as constant_memory workbooks need.
+        """
 
         if set_titles:
-            formt = self.workbook.add_format()
-            self.set_title_format(formt)
+            formt = self.get_title_format()
         else:
             formt = None
 
-        for x, column in enumerate(columns):
-            # set titles
-            if x > 0:
-                formt = None
+        windows = [
+            self.iter_column_windows(column, self.read_chunk_size) for column in columns
+        ]
+        write = self.sheet.write
+
+        row_y = row_offset
+        while True:
+            chunks = [next(column_windows, ()) for column_windows in windows]
+            if not any(chunks):
+                return
+
+            for row in zip_longest(*chunks, fillvalue=_missing):
+                self.check_row_order(row_y)
 
-            column_x = col_offset + x
+                for x, value in enumerate(row):
+                    if value is not _missing:
+                        write(row_y, col_offset + x, value, formt if x == 0 else None)
+                row_y += 1
 
-            for y, value in enumerate(column):
-                column_y = row_offset + y
-                self.sheet.write(column_y, column_x, value, formt)
+    def iter_column_windows(self, column, size):
+        """
+        Yields lists with the values of column, size values at a time. numpy
+        arrays are sliced and converted to python values with tolist.
+        """
+        if numpy is not None and isinstance(column, numpy.ndarray):
+            for start in range(0, len(column), size):
+                yield column[start : start + size].tolist()
+            return
+
+        column = iter(column)
+        while True:
+            chunk = list(islice(column, size))
+            if not chunk:
+                return
+            yield chunk
 
     def write(self, data, set_titles=False):
+        self.get_data_writer(set_titles=set_titles)(data)
+
+    def get_data_writer(self, set_titles=False):
+        """
+        Writes the titles and prepares the fields as write does, and returns
+        a function that writes the rows of data in the current sheet, each
+        call after the rows written by the previous ones
+        """
         row = 0
 
         # set titles
         if set_titles:
-            formt = self.workbook.add_format()
-            self.set_title_format(formt)
+            formt = self.get_title_format()
 
+            self.check_row_order(0)
             for field_name, field in list(self.fieldname_to_field.items()):
                 self.sheet.write(0, field.col, str(field.verbose_name), formt)
             row = 1
 
         # set format and prepare the write for each field
+        writers = {}
+        prefetchers = []
         for field_name, field in self.fieldname_to_field.items():
             field.set_column_format(self)
             field.prepare_write()
+            writers[field_name] = field.get_writer(self.workbook, self.sheet)
 
-        for row_data in data:
-            for field_name, value in row_data.items():
-                try:
-                    field = self.fieldname_to_field[field_name]
-                except KeyError:
-                    pass
-                else:
-                    field.write(self.workbook, self.sheet, row, value)
-            row += 1
+            prefetch = field.get_write_prefetcher()
+            if prefetch is not None:
+                prefetchers.append((field_name, prefetch))
+
+        def write_data(data):
+            nonlocal row
+            if prefetchers:
+                data = self.prefetch_data(data, prefetchers)
+
+            for row_data in data:
+                self.check_row_order(row)
+                for field_name, value in row_data.items():
+                    writer = writers.get(field_name)
+                    if writer is not None:
+                        writer(row, value)
+                row += 1
+
+        return write_data
+
+    async def awrite(self, data, set_titles=False):
+        """
+        Async counterpart of write, see run_blocking. data can also be an
+        async iterable, whose rows are fetched in the event loop and written
+        in chunks of read_chunk_size, so no worker waits for them.
+        """
+        if not hasattr(data, "__aiter__"):
+            await self.run_blocking(self.write, data, set_titles=set_titles)
+            return
+
+        write_data = await self.run_blocking(
+            self.get_data_writer, set_titles=set_titles
+        )
+        chunk = []
+        async for row_data in data:
+            chunk.append(row_data)
+            if len(chunk) == self.read_chunk_size:
+                await self.run_blocking(write_data, chunk)
+                chunk = []
+        if chunk:
+            await self.run_blocking(write_data, chunk)
+
+    def prefetch_data(self, data, prefetchers):
+        """
+        Yields the rows of data in chunks of read_chunk_size, calling the
+        prefetchers with the values of their field in each chunk first
+        """
+        data = iter(data)
+        while True:
+            chunk = list(islice(data, self.read_chunk_size))
+            if not chunk:
+                return
+
+            for field_name, prefetch in prefetchers:
+                prefetch([row_data.get(field_name) for row_data in chunk])
+
+            yield from chunk
@@ -0,0 +1,632 @@
+"""
+A read only xlsx backend that parses the sheet xml files directly, without
+building openpyxl cell objects. It implements the part of openpyxl's read
+only workbook and worksheet API that ExcelHandler uses to read.
+"""
+
+import array
+import html
+import mmap
+import posixpath
+import pyexpat
+import re
+import shutil
+import tempfile
+import zipfile
+
+from functools import lru_cache
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS
+from openpyxl.styles.numbers import is_date_format
+from openpyxl.styles.numbers import is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.cell import get_column_letter
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import from_excel
+from openpyxl.utils.datetime import from_ISO8601
+
+from .dates import MAC_EPOCH
+from .dates import WINDOWS_EPOCH
+from .dates import get_serial_date_converter
+
+try:
+    from lxml.etree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+
+SHEET_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+TEXT_TAG = "{%s}t" % SHEET_MAIN_NS
+RICH_TEXT_TAG = "{%s}r" % SHEET_MAIN_NS
+STRING_ITEM_TAG = "{%s}si" % SHEET_MAIN_NS
+SHEET_DATA_TAG = "{%s}sheetData" % SHEET_MAIN_NS
+DIMENSION_TAG = "{%s}dimension" % SHEET_MAIN_NS
+
+# bytes of the sheet xml files fed to the parser at a time
+BLOCK_SIZE = 64 * 1024
+
+DIGITS = "0123456789"
+
+# shared strings tables larger than this many bytes are memory mapped
+SHARED_STRINGS_MEMORY_SIZE = 64 * 1024 * 1024
+SHARED_STRINGS_CACHE_SIZE = 10000
+
+# parts of the shared strings xml: the start of each string item, the text
+# elements and the phonetic runs, whose text is not part of the string
+STRING_ITEM_RE = re.compile(rb"<(?:\w+:)?si[\s/>]")
+TEXT_RE = re.compile(rb"<(?:\w+:)?t(?:\s[^>]*?)?(?:/>|>(.*?)</(?:\w+:)?t>)", re.S)
+PHONETIC_RUN_RE = re.compile(rb"<(?:\w+:)?rPh[\s>].*?</(?:\w+:)?rPh>", re.S)
+
+
+def _cast_number(value):
+    """Converts the text of a number as openpyxl does"""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def string_item_text(element):
+    """Returns the text of a shared or inline string, without phonetic runs"""
+    text = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            text.append(child.text or "")
+        elif child.tag == RICH_TEXT_TAG:
+            text.append(child.findtext(TEXT_TAG) or "")
+    return "".join(text)
+
+
+def iter_shared_strings(source):
+    """Yields the texts of the shared strings of a sharedStrings.xml file"""
+    for event, element in iterparse(source):
+        if element.tag == STRING_ITEM_TAG:
+            yield string_item_text(element).replace("x005F_", "")
+            element.clear()
+
+
+class SharedStrings(object):
+    """
+    The shared strings table of a workbook, decoded lazily.
+
+    The table is indexed once, keeping the offset of each string in the
+    uncompressed sharedStrings.xml file, and each string is decoded the
+    first time it is read. Tables larger than max_memory_size bytes are
+    copied to a temporary file that is memory mapped instead of being kept
+    in memory. The cache_size most recently read strings are kept decoded.
+    """
+
+    def __init__(
+        self,
+        source,
+        size,
+        max_memory_size=SHARED_STRINGS_MEMORY_SIZE,
+        cache_size=SHARED_STRINGS_CACHE_SIZE,
+    ):
+        self.file = None
+        if size > max_memory_size:
+            self.file = tempfile.TemporaryFile()
+            shutil.copyfileobj(source, self.file, BLOCK_SIZE)
+            self.file.flush()
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = source.read()
+
+        self.offsets = array.array(
+            "Q", (match.start() for match in STRING_ITEM_RE.finditer(self.data))
+        )
+        # the closing tag of the table
+        self.end = self.data.rfind(b"</")
+
+        self.get = lru_cache(maxsize=cache_size)(self.decode)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        return self.get(index)
+
+    def decode(self, index):
+        """Returns the text of the string at index"""
+        start = self.offsets[index]
+        if index + 1 < len(self.offsets):
+            end = self.offsets[index + 1]
+        else:
+            end = self.end
+
+        item = self.data[start:end]
+        if b"rPh" in item:
+            item = PHONETIC_RUN_RE.sub(b"", item)
+
+        texts = TEXT_RE.findall(item)
+        text = (texts[0] if len(texts) == 1 else b"".join(texts)).decode("utf-8")
+
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if "&" in text:
+            text = html.unescape(text)
+        if "x005F_" in text:
+            text = text.replace("x005F_", "")
+        return text
+
+    def close(self):
+        if self.file is not None:
+            self.data.close()
+            self.file.close()
+
+
+class XMLWorkbook(object):
+    """
+    A read only workbook that reads the sheets of an xlsx file given by a path
+    or a file object.
+
+    Values are read as openpyxl reads them without data_only: formulas are
+    returned as strings starting with "=" and cells with date formats as
+    dates. Array and data table formulas are returned as their text.
+    """
+
+    def __init__(self, filename):
+        self.archive = zipfile.ZipFile(filename)
+
+        workbook_path = self._main_part()
+        relationships = self._relationships(workbook_path)
+
+        root = self._parse(workbook_path)
+        properties = root.find("{%s}workbookPr" % SHEET_MAIN_NS)
+        date1904 = properties is not None and properties.get("date1904") in (
+            "1",
+            "true",
+        )
+        self.epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+        self.dates = get_serial_date_converter(self)
+
+        self.date_formats, self.timedelta_formats = self._date_styles(
+            relationships.get("styles")
+        )
+        self.shared_strings = self._shared_strings(relationships.get("sharedStrings"))
+
+        self.worksheets = []
+        targets = relationships["worksheet"]
+        for sheet in root.iter("{%s}sheet" % SHEET_MAIN_NS):
+            path = targets[sheet.get("{%s}id" % REL_NS)]
+            self.worksheets.append(XMLWorksheet(self, sheet.get("name"), path))
+
+    def __getitem__(self, name):
+        for worksheet in self.worksheets:
+            if worksheet.title == name:
+                return worksheet
+        raise KeyError("Worksheet {0} does not exist.".format(name))
+
+    @property
+    def sheetnames(self):
+        return [worksheet.title for worksheet in self.worksheets]
+
+    def close(self):
+        if isinstance(self.shared_strings, SharedStrings):
+            self.shared_strings.close()
+        self.archive.close()
+
+    def _parse(self, path):
+        with self.archive.open(path) as source:
+            for event, element in iterparse(source):
+                pass
+        return element
+
+    def _main_part(self):
+        root = self._parse("_rels/.rels")
+        for relationship in root.iter("{%s}Relationship" % PKG_REL_NS):
+            if relationship.get("Type").endswith("/officeDocument"):
+                return relationship.get("Target").lstrip("/")
+        return "xl/workbook.xml"
+
+    def _relationships(self, part):
+        """
+        Returns the targets of the relationships of part by type: a dict of
+        paths by id for worksheets, a path for the other types
+        """
+        folder, name = posixpath.split(part)
+        root = self._parse(posixpath.join(folder, "_rels", name + ".rels"))
+
+        relationships = {"worksheet": {}}
+        for relationship in root.iter("{%s}Relationship" % PKG_REL_NS):
+            target = relationship.get("Target")
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+
+            kind = relationship.get("Type").rsplit("/", 1)[-1]
+            if kind == "worksheet":
+                relationships[kind][relationship.get("Id")] = target
+            else:
+                relationships[kind] = target
+
+        return relationships
+
+    def _date_styles(self, path):
+        """
+        Returns the sets of the style ids with date and with timedelta number
+        formats
+        """
+        date_formats = set()
+        timedelta_formats = set()
+        if path is None:
+            return date_formats, timedelta_formats
+
+        root = self._parse(path)
+        formats = dict(BUILTIN_FORMATS)
+        for number_format in root.iter("{%s}numFmt" % SHEET_MAIN_NS):
+            formats[int(number_format.get("numFmtId"))] = number_format.get(
+                "formatCode"
+            )
+
+        cell_xfs = root.find("{%s}cellXfs" % SHEET_MAIN_NS)
+        if cell_xfs is None:
+            return date_formats, timedelta_formats
+
+        for style_id, xf in enumerate(cell_xfs):
+            number_format = formats.get(int(xf.get("numFmtId", 0)))
+            if number_format and is_date_format(number_format):
+                date_formats.add(style_id)
+                if is_timedelta_format(number_format):
+                    timedelta_formats.add(style_id)
+
+        return date_formats, timedelta_formats
+
+    def _shared_strings(self, path):
+        if path is None:
+            return []
+
+        with self.archive.open(path) as source:
+            if source.peek(2)[:2] in (b"\xff\xfe", b"\xfe\xff"):
+                # utf-16 tables are not indexed
+                return list(iter_shared_strings(source))
+            return SharedStrings(source, self.archive.getinfo(path).file_size)
+
+
+class XMLWorksheet(object):
+    """A read only worksheet of an XMLWorkbook"""
+
+    def __init__(self, parent, title, path):
+        self.parent = parent
+        self.title = title
+        self.path = path
+        self._dimension = None
+
+    @property
+    def max_row(self):
+        return self._dimensions()[3]
+
+    @property
+    def max_column(self):
+        return self._dimensions()[2]
+
+    def _dimensions(self):
+        """Returns the boundaries of the dimension declared by the sheet"""
+        if self._dimension is None:
+            self._dimension = (None, None, None, None)
+            with self.parent.archive.open(self.path) as source:
+                for event, element in iterparse(source, events=("start",)):
+                    if element.tag == DIMENSION_TAG:
+                        self._dimension = range_boundaries(element.get("ref"))
+                        break
+                    if element.tag == SHEET_DATA_TAG:
+                        break
+        return self._dimension
+
+    def calculate_dimension(self, force=False):
+        """
+        Returns the dimension of the sheet. With force, the dimension is
+        computed reading all the rows, instead of using the declared one.
+        """
+        if force or self._dimensions()[3] is None:
+            max_row = 0
+            max_column = 0
+            for row_number, row in self._iter_cells(1, None, 1, None):
+                max_row = row_number
+                if row:
+                    max_column = max(max_column, row[-1][0])
+            self._dimension = (1, 1, max_column or 1, max_row or 1)
+
+        min_col, min_row, max_col, max_row = self._dimension
+        return "A1:{}{}".format(get_column_letter(max_col), max_row)
+
+    def iter_rows(
+        self,
+        min_row=None,
+        max_row=None,
+        min_col=None,
+        max_col=None,
+        values_only=True,
+        columns=None,
+    ):
+        """
+        Yields a tuple with the values of the cells from min_col to max_col of
+        each row from min_row to max_row, as openpyxl's read only worksheets
+        do with values_only. Cells outside the columns are skipped without
+        reading their values.
+
+        When columns, a list of column numbers, is given the tuples have the
+        values of those columns only, in the same order, instead.
+        """
+        if not values_only:
+            raise ValueError("XMLWorksheet only reads values")
+
+        min_row = min_row or 1
+        positions = None
+        if columns is not None:
+            positions = dict((column, i) for i, column in enumerate(columns))
+            min_col = min(columns)
+            max_col = max(columns)
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+
+        # without a known width, rows are as wide as their last cell
+        width = None
+        empty_row = ()
+        if positions is not None:
+            width = len(positions)
+            empty_row = (None,) * width
+        elif max_col is not None:
+            width = max_col + 1 - min_col
+            empty_row = (None,) * width
+
+        counter = min_row
+        for row_number, cells in self._iter_cells(
+            min_row, max_row, min_col, max_col, positions
+        ):
+            if cells is None:
+                # the sheet goes on after max_row, rows missing before it are
+                # returned as empty rows
+                row_number = max_row + 1
+            for _ in range(counter, row_number):
+                counter += 1
+                yield empty_row
+            if cells is None:
+                return
+
+            if width is None:
+                values = [None] * (cells[-1][0] + 1 - min_col if cells else 0)
+            else:
+                values = [None] * width
+            if positions is None:
+                for column, value in cells:
+                    values[column - min_col] = value
+            else:
+                for column, value in cells:
+                    values[positions[column]] = value
+
+            counter += 1
+            yield tuple(values)
+
+    def _iter_cells(self, min_row, max_row, min_col, max_col, columns=None):
+        """
+        Yields the row number and a list of (column, value) pairs of the cells
+        between min_col and max_col (and in columns, when given) of each row
+        of the sheet from min_row to max_row. When the sheet has rows after
+        max_row, the number of the first one is yielded with None instead of
+        the cells.
+        """
+        parser = SheetParser(self.parent, min_row, max_row, min_col, max_col, columns)
+        with self.parent.archive.open(self.path) as source:
+            while True:
+                block = source.read(BLOCK_SIZE)
+                parser.feed(block)
+
+                rows = parser.rows
+                parser.rows = []
+                for row_number, cells in rows:
+                    yield row_number, cells
+                    if cells is None:
+                        return
+
+                if not block:
+                    return
+
+
+class SheetParser(object):
+    """
+    Collects the values of the cells of a sheet xml file fed to it with
+    expat, in rows of (row number, [(column, value), ...]) pairs. Cells
+    outside the columns from min_col to max_col, or not in columns when it is
+    given, are skipped without reading their values.
+    """
+
+    def __init__(self, workbook, min_row, max_row, min_col, max_col, columns=None):
+        self.shared_strings = workbook.shared_strings
+        self.date_formats = workbook.date_formats
+        self.timedelta_formats = workbook.timedelta_formats
+        self.to_datetime = workbook.dates.to_datetime
+        self.epoch = workbook.epoch
+
+        self.min_row = min_row
+        self.max_row = max_row
+        self.min_col = min_col
+        self.max_col = max_col
+        self.selected = None if columns is None else frozenset(columns)
+
+        self.rows = []
+        self.row_number = 0
+        self.cells = None
+        self.finished = False
+
+        self.column = 0
+        self.reading = False
+        self.phonetic = False
+        self.data_type = None
+        self.style_id = None
+        self.reference = None
+        self.value = None
+        self.formula = None
+        self.text = []
+        self.columns = {}
+        self.shared_formulae = {}
+
+        # expat is faster without namespace processing, the prefix of the
+        # element names is read from the root element instead
+        self.parser = pyexpat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self.start_worksheet
+        self.parser.EndElementHandler = self.end
+        self.parser.CharacterDataHandler = self.text_data
+
+    def feed(self, block):
+        if not self.finished:
+            self.parser.Parse(block, not block)
+
+    def start_worksheet(self, name, attributes):
+        prefix = name[: name.index(":") + 1] if ":" in name else ""
+        self.row_tag = prefix + "row"
+        self.cell_tag = prefix + "c"
+        self.value_tag = prefix + "v"
+        self.formula_tag = prefix + "f"
+        self.inline_string_tag = prefix + "is"
+        self.text_tag = prefix + "t"
+        self.phonetic_run_tag = prefix + "rPh"
+
+        self.parser.StartElementHandler = self.start
+
+    def text_data(self, text):
+        if self.reading:
+            self.text.append(text)
+
+    def start(self, name, attributes):
+        if name == self.cell_tag:
+            reference = attributes.get("r")
+            if reference:
+                letters = reference.rstrip(DIGITS)
+                try:
+                    self.column = self.columns[letters]
+                except KeyError:
+                    self.column = self.columns[letters] = column_index_from_string(
+                        letters
+                    )
+            else:
+                self.column += 1
+
+            if self.cells is None or self.column < self.min_col:
+                self.data_type = None
+            elif self.max_col is not None and self.column > self.max_col:
+                self.data_type = None
+            elif self.selected is not None and self.column not in self.selected:
+                self.data_type = None
+            else:
+                self.data_type = attributes.get("t", "n")
+                self.style_id = attributes.get("s")
+                self.reference = reference
+                self.value = None
+                self.formula = None
+
+        elif self.data_type is None:
+            if name == self.row_tag:
+                self.start_row(attributes)
+
+        elif name == self.value_tag:
+            self.reading = True
+            self.text = []
+
+        elif name == self.formula_tag:
+            self.formula = attributes
+            self.reading = True
+            self.text = []
+
+        elif name == self.inline_string_tag:
+            self.text = []
+
+        elif name == self.text_tag:
+            self.reading = not self.phonetic
+
+        elif name == self.phonetic_run_tag:
+            # phonetic runs are not part of the text of inline strings
+            self.phonetic = True
+
+    def end(self, name):
+        if self.data_type is None:
+            if name == self.row_tag:
+                self.end_row()
+            return
+
+        if name == self.cell_tag:
+            self.cells.append((self.column, self.cell_value()))
+            self.data_type = None
+
+        elif name == self.value_tag or name == self.text_tag:
+            self.reading = False
+            if name == self.value_tag:
+                self.value = "".join(self.text)
+
+        elif name == self.formula_tag:
+            self.reading = False
+            self.formula = (self.formula, "".join(self.text))
+
+        elif name == self.inline_string_tag:
+            self.value = "".join(self.text)
+
+        elif name == self.phonetic_run_tag:
+            self.phonetic = False
+
+    def start_row(self, attributes):
+        if self.finished:
+            return
+
+        self.row_number = int(attributes.get("r") or self.row_number + 1)
+        self.column = 0
+
+        if self.max_row is not None and self.row_number > self.max_row:
+            self.rows.append((self.row_number, None))
+            self.finished = True
+        elif self.row_number >= self.min_row:
+            self.cells = []
+
+    def end_row(self):
+        if self.cells is not None:
+            self.rows.append((self.row_number, self.cells))
+            self.cells = None
+
+    def cell_value(self):
+        data_type = self.data_type
+        if self.formula is not None:
+            return self.formula_value(*self.formula)
+
+        if data_type == "inlineStr":
+            return self.value
+
+        value = self.value or None
+        if value is None or data_type == "str":
+            return value
+        if data_type == "n":
+            value = _cast_number(value)
+            if self.style_id is not None:
+                style_id = int(self.style_id)
+                if style_id in self.date_formats:
+                    return self.date_value(value, style_id in self.timedelta_formats)
+            return value
+        if data_type == "s":
+            return self.shared_strings[int(value)]
+        if data_type == "b":
+            return bool(int(value))
+        if data_type == "d":
+            return from_ISO8601(value)
+        return value
+
+    def formula_value(self, attributes, text):
+        value = "=" + text
+
+        if attributes.get("t") == "shared":
+            index = attributes.get("si")
+            if index in self.shared_formulae:
+                value = self.shared_formulae[index].translate_formula(self.reference)
+            elif value != "=":
+                self.shared_formulae[index] = Translator(value, self.reference)
+
+        return value
+
+    def date_value(self, value, timedelta):
+        try:
+            if timedelta:
+                return from_excel(value, self.epoch, timedelta=True)
+            return self.to_datetime(value)
+        except (OverflowError, ValueError):
+            return "#VALUE!"
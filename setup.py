@@ -19,13 +19,13 @@ setup(
     requires=[
         # 'mimeparse',
         "xlutils(>=1.6.0)",
-        "XlsxWriter(>=0.5.7)",
+        "XlsxWriter(>=3.0.6)",
         "future(>=0.18.2)",
         "openpyxl(==3.0.9)",
     ],
     install_requires=[
         "xlutils >= 1.6.0",
-        "XlsxWriter >= 0.5.7",
+        "XlsxWriter >= 3.0.6",
         "future >= 0.18.2",
         "openpyxl == 3.0.9",
     ],
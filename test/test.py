@@ -1,18 +1,77 @@
 from builtins import object
 from excel_handler import ExcelHandler
+from excel_handler import dates
 from excel_handler import fields
-
+from excel_handler import xml_reader
+from excel_handler.cache import LRUCache
+from excel_handler.cache import LookupCache
+from excel_handler.cache import MemoryLookupCache
+from excel_handler.cache import SQLiteLookupCache
+from excel_handler.formats import get_format_registry
+from excel_handler.handler import ASYNC_WORKERS
+from excel_handler.handler import FieldNotFound
+from excel_handler.handler import RowOrderError
+from excel_handler.handler import detect_format
+from openpyxl.utils.datetime import from_excel
+
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 import datetime
+import decimal
+import zipfile
+
+from unittest import mock
+
+import xlsxwriter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def run(coroutine):
+    """Runs coroutine in a new event loop, as asyncio.run, new in python 3.7"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
 
 
 class Query(object):
+    evaluations = 0
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [("one", 1), ("five", 5), ("101", 101)]
+        self.rows = rows
+
+    def __iter__(self):
+        Query.evaluations += 1
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        Query.evaluations += 1
+        return self.rows[index]
+
     def values_list(*args, **kwargs):
-        return [("one", 1), ("five", 5), ("101", 101)]
+        return args[0]
 
     def exclude(self, **kwargs):
         return self
 
+    def filter(self, **kwargs):
+        ((lookup, values),) = kwargs.items()
+        column = 0 if lookup == "pk__in" else 1
+        return Query([row for row in self.rows if row[column] in values])
+
 
 class Meta(object):
     object_name = "model"
@@ -29,6 +88,52 @@ class Model(object):
     _meta = Meta()
 
 
+class Item(object):
+    """A fake django model that counts the queries made to its manager"""
+
+    class DoesNotExist(Exception):
+        pass
+
+    class Objects(object):
+        def __init__(self):
+            self.queries = 0
+            self.items = {}
+
+        def to_pk(self, value):
+            # as django does, values are cast to integers when the query is
+            # built, and values that are not numbers fail it
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise ValueError(
+                    "Field 'id' expected a number but got {!r}.".format(value)
+                )
+
+        def get(self, pk):
+            self.queries += 1
+            try:
+                return self.items[self.to_pk(pk)]
+            except KeyError:
+                raise Item.DoesNotExist()
+
+        def filter(self, pk__in):
+            self.queries += 1
+            pks = set(self.to_pk(pk) for pk in pk__in)
+            return [self.items[pk] for pk in pks if pk in self.items]
+
+    objects = Objects()
+
+    _meta = Meta()
+
+    def __init__(self, pk):
+        self.pk = pk
+        Item.objects.items[pk] = self
+
+
+Item(1)
+Item(5)
+
+
 class BrokenExcelHandler(ExcelHandler):
     CHOICES = ((1, "one"), (2, "two"))
     first = fields.IntegerField(
@@ -102,6 +207,25 @@ class ForeignKeyExcelHandler(ExcelHandler):
     first = fields.ForeignKeyField(model=Model, col=0, default=None)
 
 
+class OnDemandForeignKeyExcelHandler(ExcelHandler):
+    first = fields.ForeignKeyField(
+        model=Model,
+        col=0,
+        lookup="code",
+        default=None,
+        lookup_strategy="on_demand",
+        cache_size=3,
+    )
+
+
+class ItemExcelHandler(ExcelHandler):
+    item = fields.DjangoModelField(col=0, model=Item, default=None)
+
+
+class BatchItemExcelHandler(ExcelHandler):
+    item = fields.DjangoModelField(col=0, model=Item, batch=True, default=None)
+
+
 class InheritedExcelHandler(MyExcelHandler):
     pass
 
@@ -122,6 +246,159 @@ class TestChangeSheetCase(unittest.TestCase):
         self.assertEqual(len(data), 2)
 
 
+class TestOnDemandCase(unittest.TestCase):
+    def test_read(self):
+        with MyExcelHandler(path="test/test.xlsx", on_demand=True) as eh:
+            on_demand_data = eh.read()
+
+        eh = MyExcelHandler(path="test/test.xlsx")
+        data = eh.read()
+
+        self.assertEqual(len(on_demand_data), 3)
+        for i, obj in enumerate(data):
+            for k, v in obj.items():
+                if k != "date_time":
+                    self.assertEqual(on_demand_data[i][k], v)
+
+    def test_change_sheet(self):
+        with MyExcelHandler(path="test/test.xlsx", on_demand=True) as eh:
+            eh.set_sheet_by_name("Sheet2")
+            self.assertEqual(len(eh.read()), 2)
+
+            eh.set_sheet(0)
+            self.assertEqual(len(eh.read()), 3)
+
+    def test_read_rows(self):
+        column_structure = {"first": 0, "second": 1, "third": 2, "fourth": 3}
+
+        with ExcelHandler(path="test/test.xlsx", on_demand=True) as eh:
+            data = eh.read_rows(column_structure)
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[0]["second"], "two")
+        self.assertEqual(data[2]["fourth"], 12)
+
+
+class TestXMLBackend(unittest.TestCase):
+    class XMLExcelHandler(MyExcelHandler):
+        # without defaults that change between reads
+        date_time = fields.DateTimeField(col=4, default=None)
+        date = fields.DateField(col=5, default=None)
+
+    def test_read(self):
+        with self.XMLExcelHandler(path="test/test.xlsx", on_demand=True) as eh:
+            expected = eh.read_all_sheets()
+
+        with self.XMLExcelHandler(path="test/test.xlsx", backend="xml") as eh:
+            self.assertEqual(eh.read_all_sheets(), expected)
+
+        with open("test/test.xlsx", "rb") as excel_file:
+            eh = self.XMLExcelHandler(excel_file=excel_file, backend="xml")
+            self.assertEqual(eh.read(), expected["Sheet1"].data)
+
+    def test_read_rows(self):
+        column_structure = {"first": 0, "second": 1, "third": 2, "fourth": 3}
+
+        with ExcelHandler(path="test/test.xlsx", backend="xml") as eh:
+            data = eh.read_rows(column_structure)
+            eh.set_sheet_by_name("Sheet4")
+            rows = eh.read_rows(["first"], row_type=tuple)
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[0]["second"], "two")
+        self.assertEqual(data[2]["fourth"], 12)
+        self.assertEqual(rows, [(1,), (5,), (None,), (101,)])
+
+    def test_read_partitioned(self):
+        eh = self.XMLExcelHandler(path="test/test.xlsx", backend="xml")
+        eh.set_sheet_by_name("Sheet4")
+        expected = eh.read(return_errors=True)
+
+        self.assertEqual(
+            eh.read_partitioned(
+                chunk_size=1, workers=2, executor="thread", return_errors=True
+            ),
+            expected,
+        )
+
+    def test_shared_strings(self):
+        archive = zipfile.ZipFile("test/test.xlsx")
+        with archive.open("xl/sharedStrings.xml") as source:
+            expected = list(xml_reader.iter_shared_strings(source))
+
+        with archive.open("xl/sharedStrings.xml") as source:
+            # memory mapped
+            shared_strings = xml_reader.SharedStrings(source, size=1, max_memory_size=0)
+
+        self.assertEqual(len(shared_strings), len(expected))
+        self.assertEqual(list(shared_strings), expected)
+        self.assertEqual(shared_strings[1], "six")
+        self.assertRaises(IndexError, shared_strings.__getitem__, len(expected))
+        shared_strings.close()
+        archive.close()
+
+    def test_missing_row_without_dimension(self):
+        source = io.BytesIO()
+        workbook = xlsxwriter.Workbook(source)
+        sheet = workbook.add_worksheet()
+        sheet.write(0, 0, "first")
+        sheet.write(2, 1, "third")
+        workbook.close()
+
+        # rewrite the sheet without its <dimension> element
+        excel_file = io.BytesIO()
+        with zipfile.ZipFile(source) as archive, zipfile.ZipFile(
+            excel_file, "w"
+        ) as target:
+            for name in archive.namelist():
+                data = archive.read(name)
+                if name == "xl/worksheets/sheet1.xml":
+                    start = data.index(b"<dimension")
+                    data = data[:start] + data[data.index(b"/>", start) + 2 :]
+                target.writestr(name, data)
+        excel_file.seek(0)
+
+        eh = ExcelHandler(excel_file=excel_file, backend="xml")
+        self.assertIsNone(eh.sheet.max_column)
+        self.assertEqual(
+            list(eh.sheet.iter_rows(values_only=True)),
+            [("first",), (), (None, "third")],
+        )
+
+    def test_unknown_backend(self):
+        self.assertRaises(
+            ValueError, ExcelHandler, path="test/test.xlsx", backend="xlrd"
+        )
+
+
+class ScatteredExcelHandler(ExcelHandler):
+    sixth = fields.CharField(col=6, default="")
+    second = fields.CharField(col=1, default="")
+    fourth = fields.IntegerField(col=3)
+
+
+class TestColumnProjection(unittest.TestCase):
+    def test_read(self):
+        expected = [
+            {"second": "two", "fourth": 4, "sixth": "=TRUE()"},
+            {"second": "six", "fourth": 8, "sixth": "=FALSE()"},
+            {"second": "", "fourth": 12, "sixth": ""},
+        ]
+        for backend in ("openpyxl", "xml"):
+            with ScatteredExcelHandler(path="test/test.xlsx", backend=backend) as eh:
+                self.assertEqual(eh.read(), expected)
+                self.assertEqual(
+                    list(eh.iter_field_rows(max_row=1)), [("two", 4, "=TRUE()")]
+                )
+
+    def test_single_column(self):
+        class SingleExcelHandler(ExcelHandler):
+            fourth = fields.IntegerField(col=3)
+
+        eh = SingleExcelHandler(path="test/test.xlsx")
+        self.assertEqual(eh.read(), [{"fourth": 4}, {"fourth": 8}, {"fourth": 12}])
+
+
 class TestExcelHandlerCase(unittest.TestCase):
     def test_read_rows(self):
 
@@ -152,6 +429,26 @@ class TestExcelHandlerCase(unittest.TestCase):
         for key, value in list(data[1].items()):
             self.assertEqual(second_row[0][key], value)
 
+    def test_read_rows_row_type(self):
+        eh = ExcelHandler(path="test/test.xlsx", mode="r")
+        column_structure = {"first": 0, "second": 1, "third": 2}
+
+        rows = eh.read_rows(column_structure, row_type=tuple)
+        self.assertEqual(rows[0], (1, "two", 3))
+
+        rows = eh.read_rows(column_structure, row_type="namedtuple")
+        self.assertEqual(rows[1].second, "six")
+        self.assertEqual(rows[1]._asdict(), {"first": 5, "second": "six", "third": 7})
+
+        rows = eh.read_rows(column_structure, row_type="record")
+        self.assertEqual(rows[0].third, 3)
+        self.assertEqual(tuple(rows[2]), (None, None, None))
+        self.assertFalse(hasattr(rows[0], "__dict__"))
+
+        self.assertRaises(
+            ValueError, eh.read_rows, column_structure, row_type="unknown"
+        )
+
     def test_write_rows(self):
 
         rows = [[0, 1, 2], [3, 4, 5], [6, 7, 8]]
@@ -162,6 +459,213 @@ class TestExcelHandlerCase(unittest.TestCase):
         workbook.save()
 
 
+class TestConstantMemoryCase(unittest.TestCase):
+    def setUp(self):
+        super(TestConstantMemoryCase, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "out.xlsx")
+
+    def tearDown(self):
+        super(TestConstantMemoryCase, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write(self):
+        eh = MyExcelHandler(path=self.path, mode="w", constant_memory=True)
+        eh.add_sheet(name="Data")
+        eh.write([{"first": 1, "fourth": "a"}, {"first": 2, "fourth": "b"}])
+        eh.save()
+
+        data = MyExcelHandler(path=self.path).read()
+        self.assertEqual([row["first"] for row in data], [1, 2])
+        self.assertEqual([row["fourth"] for row in data], ["a", "b"])
+
+    def test_write_columns(self):
+        eh = ExcelHandler(path=self.path, mode="w", constant_memory=True)
+        eh.add_sheet(name="Data")
+        eh.write_columns([[1, 2, 3], ["a", "b"]])
+        eh.save()
+
+        eh = ExcelHandler(path=self.path)
+        rows = eh.read_rows(["number", "letter"], row_type=tuple)
+        self.assertEqual(rows, [(1, "a"), (2, "b"), (3, None)])
+
+    def test_write_column_windows(self):
+        eh = ExcelHandler(path=self.path, mode="w", constant_memory=True)
+        eh.read_chunk_size = 2
+        eh.add_sheet(name="Data")
+
+        columns = [(y for y in range(5)), ["a", "b", "c"]]
+        if numpy is not None:
+            columns.append(numpy.arange(4) * 1.5)
+        eh.write_columns(iter(columns), row_offset=1)
+        eh.save()
+
+        eh = ExcelHandler(path=self.path)
+        rows = eh.read_rows(["number", "letter", "amount"], row_type=tuple)
+        self.assertEqual(
+            [row[:2] for row in rows[1:]],
+            [(0, "a"), (1, "b"), (2, "c"), (3, None), (4, None)],
+        )
+        if numpy is not None:
+            self.assertEqual([row[2] for row in rows[1:]], [0, 1.5, 3.0, 4.5, None])
+
+    def test_row_order(self):
+        eh = ExcelHandler(path=self.path, mode="w", constant_memory=True)
+        eh.add_sheet(name="Data")
+        eh.write_rows([[1, 2], [3, 4]], row_offset=5)
+
+        self.assertRaises(RowOrderError, eh.write_rows, [[5, 6]])
+
+        # rows are checked per sheet
+        eh.add_sheet(name="Other")
+        eh.write_rows([[5, 6]])
+        eh.save()
+
+
+class UpperCharField(fields.CharField):
+    def write(self, workbook, sheet, row, value):
+        sheet.write(row, self.col, value.upper())
+
+
+class CustomWriteExcelHandler(ExcelHandler):
+    name = fields.CharField(col=0)
+    code = UpperCharField(col=1)
+
+
+class BoldTitleExcelHandler(MyExcelHandler):
+    def set_title_format(self, formt):
+        formt.set_bold()
+
+
+class TestWriteCase(unittest.TestCase):
+    def setUp(self):
+        super(TestWriteCase, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "out.xlsx")
+
+    def tearDown(self):
+        super(TestWriteCase, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_custom_field_write(self):
+        eh = CustomWriteExcelHandler(path=self.path, mode="w")
+        eh.add_sheet(name="Data")
+        eh.write([{"name": "a", "code": "b", "unknown": 1}, {"name": "d", "code": "c"}])
+        eh.save()
+
+        data = CustomWriteExcelHandler(path=self.path).read()
+        self.assertEqual(data, [{"name": "a", "code": "B"}, {"name": "d", "code": "C"}])
+
+    def test_format_registry(self):
+        class TitleExcelHandler(ExcelHandler):
+            def set_title_format(self, formt):
+                formt.set_bold()
+
+        eh = TitleExcelHandler(path=self.path, mode="w")
+        # the default date, datetime and time formats
+        self.assertEqual(len(eh.formats), 3)
+
+        for name in ("First", "Second"):
+            eh.add_sheet(name=name)
+            for i in range(3):
+                eh.write_rows([["a", "b"], [1, 2]], row_offset=i * 2, set_titles=True)
+            fields.DateField(col=0).set_format(eh.workbook, eh.sheet)
+            fields.DateField(col=1).set_format(eh.workbook, eh.sheet)
+
+        self.assertEqual(len(eh.formats), 5)
+        self.assertEqual(eh.formats.hits, 3)
+        self.assertIs(get_format_registry(eh.workbook), eh.formats)
+        eh.save()
+
+        eh = ExcelHandler(path=self.path)
+        self.assertTrue(eh.sheet["A1"].font.b)
+        self.assertTrue(eh.workbook["Second"]["A5"].font.b)
+
+    def test_write_sheet(self):
+        data = [
+            {"first": 1, "second": 2, "fourth": "http://magnet.cl"},
+            {"first": 2, "third": "a & b", "date": datetime.date(2020, 1, 2)},
+        ]
+        for row in data:
+            row["date_time"] = datetime.datetime(2020, 1, 2, 3, 4)
+
+        for executor in ("thread", "process"):
+            eh = BoldTitleExcelHandler(path=self.path, mode="w")
+            eh.add_sheet(name="Sequential")
+            eh.write(data, set_titles=True)
+            for name in ("First", "Second"):
+                eh.write_sheet(name, data, set_titles=True)
+            eh.save(workers=2, executor=executor)
+
+            eh = BoldTitleExcelHandler(path=self.path)
+            self.assertEqual(eh.workbook.sheetnames, ["Sequential", "First", "Second"])
+            expected = eh.read(skip_titles=True)
+            for name in ("First", "Second"):
+                eh.set_sheet_by_name(name)
+                self.assertEqual(eh.read(skip_titles=True), expected)
+                self.assertTrue(eh.sheet["A1"].font.b)
+                self.assertEqual(eh.sheet["B2"].value, "two")
+                self.assertEqual(eh.sheet["C3"].value, "a & b")
+                self.assertEqual(eh.sheet["D2"].hyperlink.target, "http://magnet.cl")
+                self.assertEqual(eh.sheet["F3"].number_format, "YYYY-MM-DD")
+
+    def test_write_sheet_unsupported(self):
+        # without the xlsxwriter internals used to render them, the rows are
+        # written right away
+        data = [{"first": 1, "second": 2}, {"first": 2, "third": "c"}]
+        eh = MyExcelHandler(path=self.path, mode="w")
+        with mock.patch("excel_handler.handler._rendering_supported", False):
+            eh.write_sheet("Data", data, set_titles=True)
+        self.assertEqual(eh._rendered_sheets, [])
+        eh.save()
+
+        eh = MyExcelHandler(path=self.path)
+        self.assertEqual(eh.workbook.sheetnames, ["Data"])
+        self.assertEqual(eh.sheet["B2"].value, "two")
+        self.assertEqual(eh.sheet["C3"].value, "c")
+
+    def test_write_sheet_new_formats(self):
+        # rows using formats the workbook does not have are written by the
+        # handler saving the document
+        class ItalicCharField(fields.CharField):
+            def write(self, workbook, sheet, row, value):
+                italic = get_format_registry(workbook).get({"italic": True})
+                sheet.write(row, self.col, value, italic)
+
+        class ItalicExcelHandler(ExcelHandler):
+            name = ItalicCharField(col=0)
+
+        eh = ItalicExcelHandler(path=self.path, mode="w")
+        eh.write_sheet("Data", [{"name": "a"}, {"name": "b"}])
+        eh.save(executor="thread")
+
+        eh = ItalicExcelHandler(path=self.path)
+        self.assertEqual(eh.read(), [{"name": "a"}, {"name": "b"}])
+        self.assertTrue(eh.sheet["A2"].font.i)
+
+    def test_cell_writers(self):
+        eh = MyExcelHandler(path=self.path, mode="w")
+        eh.add_sheet(name="Data")
+        eh.write(
+            [
+                {"first": 1, "third": "=1+1", "fourth": "http://magnet.cl"},
+                {"first": "2", "third": "", "fourth": None, "boolean": True},
+                {"first": 3.5, "third": "c", "date": datetime.date(2020, 1, 2)},
+            ]
+        )
+        eh.save()
+
+        eh = MyExcelHandler(path=self.path)
+        self.assertEqual(eh.sheet["C1"].data_type, "f")
+        self.assertEqual(eh.sheet["D1"].hyperlink.target, "http://magnet.cl")
+        self.assertEqual(eh.sheet["A2"].value, "2")
+        self.assertIsNone(eh.sheet["C2"].value)
+        self.assertEqual(eh.sheet["G2"].value, True)
+        self.assertEqual(eh.sheet["A3"].value, 3.5)
+        self.assertEqual(eh.sheet["C3"].value, "c")
+        self.assertEqual(eh.sheet["F3"].value, datetime.datetime(2020, 1, 2))
+
+
 class TestErrorHandler(unittest.TestCase):
     def setUp(self):
         super(TestErrorHandler, self).setUp()
@@ -185,6 +689,834 @@ class TestErrorHandler(unittest.TestCase):
                 self.assertEqual(read_value, expected_value)
 
 
+class TestIterRead(unittest.TestCase):
+    def test_iter_read(self):
+        eh = MyExcelHandler(path="test/test.xlsx", mode="r")
+        rows = eh.iter_read()
+
+        self.assertEqual(next(rows)["first"], 1)
+        self.assertEqual(next(rows)["first"], 5)
+        self.assertEqual(next(rows)["first"], 100)
+        self.assertRaises(StopIteration, next, rows)
+
+    def test_iter_read_errors(self):
+        eh = BrokenExcelHandler(path="test/test.xlsx", mode="r")
+        rows = list(eh.iter_read(return_errors=True))
+
+        self.assertEqual(len(rows), 2)
+
+        row_data, error = rows[0]
+        self.assertEqual(row_data, {"first": 1, "second": 2})
+        self.assertIsNone(error)
+
+        row_data, error = rows[1]
+        self.assertIsNone(row_data)
+        self.assertEqual(error.row, 2)
+        self.assertEqual(error.field_name, "second")
+
+    def test_iter_read_rows(self):
+        eh = ExcelHandler(path="test/test.xlsx", mode="r")
+        rows = eh.iter_read_rows({"first": 0, "second": 1}, starting_row=2)
+
+        self.assertEqual(next(rows), {"first": 5, "second": "six"})
+
+
+class TestColumnPlan(unittest.TestCase):
+    def test_column_plan(self):
+        plan = InheritedExcelHandler.column_plan
+
+        self.assertEqual(
+            [column.name for column in plan],
+            [field.name for field in InheritedExcelHandler.fields],
+        )
+        self.assertEqual([column.index for column in plan], list(range(8)))
+        self.assertEqual(plan[0].default(), 100)
+        self.assertEqual(plan[5].default(), datetime.date.today())
+        self.assertIsNone(plan[3].default)
+
+    def test_caster(self):
+        caster = MyExcelHandler.column_plan[2].cast
+
+        self.assertEqual(caster(3, None, {}), "3")
+        self.assertEqual(caster("  ", None, {}), "hello")
+
+        caster = MyExcelHandler.column_plan[0].cast
+        self.assertRaises(ValueError, caster, "a", None, {})
+
+
+class TestReadColumns(unittest.TestCase):
+    def test_read_columns(self):
+        eh = MyExcelHandler(path="test/test.xlsx", mode="r")
+        columns, masks = eh.read_columns()
+
+        self.assertEqual(list(columns["first"]), [1, 5, 100])
+        self.assertEqual(list(masks["first"]), [True, True, False])
+        self.assertEqual(list(columns["second"]), [2, 6, 3])
+        self.assertEqual(list(columns["fourth"]), ["4", "8", "12"])
+        self.assertEqual(list(masks["fourth"]), [True, True, True])
+        self.assertEqual(list(masks["date"]), [True, True, False])
+        self.assertEqual(len(columns["boolean"]), 3)
+
+    def test_read_columns_errors(self):
+        eh = BrokenExcelHandler(path="test/test.xlsx", mode="r")
+        columns, masks = eh.read_columns()
+
+        self.assertEqual(list(columns["first"]), [1, 5])
+        self.assertEqual(list(columns["second"]), [2, 0])
+        self.assertEqual(list(masks["second"]), [True, False])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_read_columns_numpy(self):
+        eh = MyExcelHandler(path="test/test.xlsx", mode="r")
+        columns, masks = eh.read_columns()
+
+        self.assertEqual(columns["first"].dtype, numpy.int64)
+        self.assertEqual(columns["date"].dtype, numpy.dtype("datetime64[D]"))
+        self.assertEqual(columns["date"][0], numpy.datetime64("2013-10-01"))
+        self.assertEqual(columns["boolean"].dtype, numpy.bool_)
+        self.assertEqual(list(columns["boolean"]), [True, False, False])
+        self.assertEqual(masks["first"].dtype, numpy.bool_)
+        self.assertIsInstance(columns["third"], list)
+
+
+class TypedExcelHandler(ExcelHandler):
+    date_time = fields.DateTimeField(col=0)
+    boolean = fields.BooleanField(col=1)
+
+
+class TestReadColumnsTypes(unittest.TestCase):
+    def test_text_cells(self):
+        # text left as it is by cast is masked out of date and boolean columns
+        contents = "2020-01-02,TRUE\nn/a,maybe\n2020-01-03 04:05,FALSE\n"
+        eh = TypedExcelHandler(excel_file=io.StringIO(contents), format="csv")
+        columns, masks = eh.read_columns()
+
+        self.assertEqual(list(masks["date_time"]), [True, False, True])
+        self.assertEqual(list(masks["boolean"]), [True, False, True])
+        if numpy is None:
+            self.assertEqual(columns["date_time"][1], None)
+        else:
+            self.assertTrue(numpy.isnat(columns["date_time"][1]))
+            self.assertEqual(
+                columns["date_time"][2], numpy.datetime64("2020-01-03T04:05")
+            )
+            self.assertEqual(list(columns["boolean"]), [True, False, False])
+
+
+class TestReadAllSheets(unittest.TestCase):
+    def test_read_all_sheets(self):
+        eh = BrokenExcelHandler(path="test/test.xlsx")
+
+        for executor in ("thread", "process"):
+            results = eh.read_all_sheets(workers=2, executor=executor)
+
+            self.assertEqual(list(results), ["Sheet1", "Sheet2", "Sheet3", "Sheet4"])
+            self.assertEqual(results["Sheet1"].data, [{"first": 1, "second": 2}])
+            self.assertEqual(len(results["Sheet1"].errors), 1)
+            self.assertEqual(results["Sheet1"].errors[0].row, 2)
+            self.assertEqual(results["Sheet3"].data, [])
+            self.assertEqual(len(results["Sheet4"].data), 2)
+
+    def test_read_all_sheets_excel_file(self):
+        with open("test/test.xlsx", "rb") as excel_file:
+            eh = BrokenExcelHandler(excel_file=excel_file)
+
+            results = eh.read_all_sheets(
+                executor="thread", sheet_names=["Sheet4"], ignore_blank_rows=False
+            )
+
+        self.assertEqual(list(results), ["Sheet4"])
+        self.assertEqual(len(results["Sheet4"].data), 3)
+
+    def test_read_all_sheets_return_errors(self):
+        eh = BrokenExcelHandler(path="test/test.xlsx")
+
+        results = eh.read_all_sheets(
+            executor="thread", sheet_names=["Sheet1"], return_errors=True
+        )
+
+        self.assertEqual(results["Sheet1"].data, [{"first": 1, "second": 2}])
+        self.assertEqual([error.row for error in results["Sheet1"].errors], [2])
+
+
+class HeaderExcelHandler(ExcelHandler):
+    bind_by_header = True
+
+    name = fields.CharField(col=0, verbose_name="Name")
+    amount = fields.FloatField(col=1, verbose_name="Amount")
+    code = fields.CharField(col=2, verbose_name="Product code", aliases=["Code"])
+
+
+class TestHeaderBinding(unittest.TestCase):
+    def setUp(self):
+        super(TestHeaderBinding, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "header.xlsx")
+
+        workbook = xlsxwriter.Workbook(self.path)
+        sheet = workbook.add_worksheet("Data")
+        sheet.write_row(0, 0, ["code", "Other", " AMOUNT ", "Name"])
+        sheet.write_row(1, 0, ["A1", "x", 1.5, "first"])
+        sheet.write_row(2, 0, ["B2", "y", 3, "second"])
+        workbook.close()
+
+    def tearDown(self):
+        super(TestHeaderBinding, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_read(self):
+        expected = [
+            {"name": "first", "amount": 1.5, "code": "A1"},
+            {"name": "second", "amount": 3.0, "code": "B2"},
+        ]
+        for backend in ("openpyxl", "xml"):
+            with HeaderExcelHandler(path=self.path, backend=backend) as eh:
+                self.assertEqual(eh.get_field_columns(), [3, 2, 0])
+                self.assertEqual(eh.read(skip_titles=True), expected)
+
+    def test_cache(self):
+        calls = []
+
+        class CountingExcelHandler(HeaderExcelHandler):
+            def resolve_header_columns(self):
+                calls.append(self.sheet.title)
+                return super(CountingExcelHandler, self).resolve_header_columns()
+
+        for i in range(2):
+            with CountingExcelHandler(path=self.path, on_demand=True) as eh:
+                eh.read(skip_titles=True)
+
+        self.assertEqual(calls, ["Data"])
+
+    def test_csv_text_source(self):
+        # csv files are fingerprinted by their start, where the header is
+        rows = "A1,x,1.5,first\n" * 5000
+        for header, expected in (
+            ("code,Other, AMOUNT ,Name\n", {"name": "first", "code": "A1"}),
+            ("Name,Other, AMOUNT ,code\n", {"name": "A1", "code": "first"}),
+        ):
+            csv_file = io.StringIO(header + rows)
+            eh = HeaderExcelHandler(excel_file=csv_file, format="csv")
+            expected["amount"] = 1.5
+
+            data = eh.read(skip_titles=True)
+            self.assertEqual(len(data), 5000)
+            self.assertEqual(data[0], expected)
+
+    def test_missing_column(self):
+        class MissingExcelHandler(HeaderExcelHandler):
+            price = fields.FloatField(col=3, verbose_name="Price")
+
+        eh = MissingExcelHandler(path=self.path)
+        self.assertRaises(FieldNotFound, eh.read, skip_titles=True)
+
+
+class TestReadPartitioned(unittest.TestCase):
+    def test_read_partitioned(self):
+        eh = MyExcelHandler(path="test/test.xlsx")
+        data = eh.read()
+
+        for executor in ("thread", "process"):
+            partitioned_data = eh.read_partitioned(chunk_size=1, executor=executor)
+
+            self.assertEqual(len(partitioned_data), 3)
+            for i, obj in enumerate(data):
+                for k, v in obj.items():
+                    if k != "date_time":
+                        self.assertEqual(partitioned_data[i][k], v)
+
+    def test_read_partitioned_errors(self):
+        eh = BrokenExcelHandler(path="test/test.xlsx")
+        eh.set_sheet_by_name("Sheet4")
+
+        data = eh.read_partitioned(
+            chunk_size=2, executor="thread", ignore_blank_rows=False
+        )
+        self.assertEqual([row["first"] for row in data], [1, 100, 101])
+
+        # one range per worker
+        data = eh.read_partitioned(
+            workers=2, executor="thread", ignore_blank_rows=False
+        )
+        self.assertEqual([row["first"] for row in data], [1, 100, 101])
+
+        eh.set_sheet(0)
+        data, errors = eh.read_partitioned(chunk_size=1, workers=2, return_errors=True)
+        self.assertEqual(data, [{"first": 1, "second": 2}])
+        self.assertEqual([error.row for error in errors], [2])
+
+    def test_stale_dimension(self):
+        source = io.BytesIO()
+        workbook = xlsxwriter.Workbook(source)
+        workbook.add_worksheet().write_column(0, 0, range(1, 7))
+        workbook.close()
+
+        # the sheet declares fewer rows than it has
+        excel_file = io.BytesIO()
+        with zipfile.ZipFile(source) as archive, zipfile.ZipFile(
+            excel_file, "w"
+        ) as target:
+            for name in archive.namelist():
+                data = archive.read(name)
+                if name == "xl/worksheets/sheet1.xml":
+                    data = data.replace(
+                        b'<dimension ref="A1:A6"/>', b'<dimension ref="A1:A2"/>'
+                    )
+                target.writestr(name, data)
+
+        for backend in ("openpyxl", "xml"):
+            excel_file.seek(0)
+            eh = BrokenExcelHandler(
+                excel_file=excel_file, on_demand=True, backend=backend
+            )
+            self.assertEqual(eh.sheet.max_row, 2)
+            expected = eh.read()
+            if backend == "xml":
+                # openpyxl stops at the declared dimension itself
+                self.assertEqual(len(expected), 6)
+            for chunk_size in (1, None):
+                self.assertEqual(
+                    eh.read_partitioned(
+                        workers=2, chunk_size=chunk_size, executor="thread"
+                    ),
+                    expected,
+                )
+            self.assertEqual(
+                eh.read_partitioned(executor="thread", starting_row=4), expected[3:]
+            )
+
+
+class BlockingExcelHandler(BrokenExcelHandler):
+    """Handler whose read waits for resume, recording when it is closed"""
+
+    read_chunk_size = 1
+
+    def __init__(self, *args, **kwargs):
+        super(BlockingExcelHandler, self).__init__(*args, **kwargs)
+        self.started = threading.Event()
+        self.resume = threading.Event()
+        self.closed = threading.Event()
+
+    def read(self, *args, **kwargs):
+        self.started.set()
+        self.resume.wait()
+        return super(BlockingExcelHandler, self).read(*args, **kwargs)
+
+    def close(self):
+        super(BlockingExcelHandler, self).close()
+        self.closed.set()
+
+
+class TestAsync(unittest.TestCase):
+    def setUp(self):
+        super(TestAsync, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "out.xlsx")
+
+    def tearDown(self):
+        super(TestAsync, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_aread(self):
+        async def read():
+            async with await BrokenExcelHandler.aopen(path="test/test.xlsx") as eh:
+                return await eh.aread(return_errors=True)
+
+        data, errors = run(read())
+        self.assertEqual(data, [{"first": 1, "second": 2}])
+        self.assertEqual([error.row for error in errors], [2])
+
+    def test_aiter_read(self):
+        eh = BlockingExcelHandler(path="test/test.xlsx", on_demand=True)
+        eh.resume.set()
+        eh.set_sheet(3)
+        expected = list(eh.iter_read(ignore_blank_rows=False))
+
+        async def read(limit=None):
+            rows = []
+            iterator = eh.aiter_read(ignore_blank_rows=False)
+            async for row in iterator:
+                rows.append(row)
+                if len(rows) == limit:
+                    break
+            await iterator.aclose()
+            return rows
+
+        self.assertEqual(run(read()), expected)
+        self.assertEqual(run(read(limit=1)), expected[:1])
+        self.assertFalse(eh.closed.is_set())
+        eh.close()
+
+    def test_awrite(self):
+        async def rows():
+            for x in range(3):
+                await asyncio.sleep(0)
+                yield {"first": x, "second": 1}
+
+        async def write():
+            eh = await BrokenExcelHandler.aopen(path=self.path, mode="w")
+            eh.add_sheet(name="Data")
+            await eh.awrite(rows(), set_titles=True)
+            await eh.asave()
+
+        run(write())
+
+        data = BrokenExcelHandler(path=self.path).read(skip_titles=True)
+        self.assertEqual(data, [{"first": x, "second": 1} for x in range(3)])
+
+    def test_awrite_pipelines(self):
+        # as many pipelines as async workers, the rows of each one are read
+        # and written by the same workers
+        data = [{"first": x, "second": 1} for x in range(5)]
+        eh = BrokenExcelHandler(path=self.path, mode="w")
+        eh.add_sheet(name="Data")
+        eh.write(data)
+        eh.save()
+
+        paths = [
+            os.path.join(self.tmp_dir, "copy{}.xlsx".format(x))
+            for x in range(ASYNC_WORKERS)
+        ]
+
+        async def copy_all():
+            pipelines = []
+            for path in paths:
+                src = await BrokenExcelHandler.aopen(path=self.path)
+                dst = await BrokenExcelHandler.aopen(path=path, mode="w")
+                dst.add_sheet(name="Data")
+                pipelines.append((src, dst))
+
+            await asyncio.wait_for(
+                asyncio.gather(
+                    *[dst.awrite(src.aiter_read()) for src, dst in pipelines]
+                ),
+                timeout=10,
+            )
+            for src, dst in pipelines:
+                await src.aclose()
+                await dst.aclose()
+
+        run(copy_all())
+
+        for path in paths:
+            self.assertEqual(BrokenExcelHandler(path=path).read(), data)
+
+    def test_cancel(self):
+        eh = BlockingExcelHandler(path="test/test.xlsx", on_demand=True)
+
+        async def cancel():
+            task = asyncio.ensure_future(eh.aread())
+            while not eh.started.is_set():
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        run(cancel())
+        # the read is not interrupted, the handler is closed once it ends
+        self.assertFalse(eh.closed.is_set())
+        eh.resume.set()
+        self.assertTrue(eh.closed.wait(5))
+
+
+class TestCSV(unittest.TestCase):
+    def setUp(self):
+        super(TestCSV, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestCSV, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_read(self):
+        data = [
+            {
+                "first": x,
+                "second": x + 1,
+                "third": 'a, "b"\nc',
+                "fourth": "=1+1",
+                "date_time": datetime.datetime(2020, 1, 2, 3, 4, 5, 6),
+                "date": datetime.date(2020, 1, x + 1),
+                "boolean": x == 0,
+                "empty_last_fields": "",
+            }
+            for x in range(3)
+        ]
+
+        for format, delimiter in (("csv", ","), ("tsv", "\t")):
+            path = os.path.join(self.tmp_dir, "out." + format)
+            eh = MyExcelHandler(path=path, mode="w")
+            eh.add_sheet(name="Data")
+            eh.write(data, set_titles=True)
+            eh.save()
+
+            with open(path, newline="") as csv_file:
+                titles = csv_file.readline()
+            self.assertEqual(titles.split(delimiter)[:3], ["First", "Second", "Third"])
+
+            eh = MyExcelHandler(path=path)
+            self.assertEqual(eh.format, format)
+            self.assertEqual(eh.read(skip_titles=True), data)
+
+            with open(path, "rb") as csv_file:
+                eh = MyExcelHandler(excel_file=io.BytesIO(csv_file.read()))
+            self.assertEqual(eh.format, format)
+            self.assertEqual(eh.read(skip_titles=True), data)
+
+    def test_read_errors(self):
+        contents = "1,two,,,2020-01-02\nx,one,,,\n,nine,,,\n"
+        eh = MyExcelHandler(excel_file=io.StringIO(contents), format="csv")
+
+        data, errors = eh.read(return_errors=True)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["first"], 1)
+        self.assertEqual(data[0]["second"], 2)
+        self.assertEqual(data[0]["third"], "hello")
+        self.assertEqual(data[0]["date_time"], datetime.datetime(2020, 1, 2))
+        self.assertEqual([error.row for error in errors], [2, 3])
+        self.assertEqual([error.field_name for error in errors], ["first", "second"])
+
+    def test_text_source(self):
+        # the workers get the contents of text files encoded
+        contents = (
+            "1,two,ñandú,,2020-01-02,2020-01-02\n"
+            "x,one,,,2020-01-03,2020-01-03\n"
+            "3,three,é,,2020-01-04,2020-01-04\n"
+        )
+        eh = MyExcelHandler(excel_file=io.StringIO(contents), format="csv")
+        expected = eh.read(return_errors=True)
+
+        result = eh.read_all_sheets(executor="thread")
+        self.assertEqual(tuple(result["Sheet1"]), expected)
+        self.assertEqual(
+            eh.read_partitioned(
+                chunk_size=1, workers=2, executor="thread", return_errors=True
+            ),
+            expected,
+        )
+
+    def test_row_order(self):
+        path = os.path.join(self.tmp_dir, "out.csv")
+        eh = ExcelHandler(path=path, mode="w")
+        eh.add_sheet(name="Data")
+        eh.write_rows([[1, 2]], row_offset=2)
+        with self.assertRaises(RowOrderError):
+            eh.write_rows([[3, 4]])
+        with self.assertRaises(ValueError):
+            eh.add_sheet(name="Other")
+        eh.save()
+
+        with open(path, newline="") as csv_file:
+            self.assertEqual(csv_file.read(), "\r\n\r\n1,2\r\n")
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("report.CSV", sniff=False), "csv")
+        self.assertEqual(detect_format("report.tsv", sniff=False), "tsv")
+        self.assertEqual(detect_format("report.xlsx", sniff=False), "xlsx")
+        self.assertEqual(detect_format(excel_file=io.BytesIO(b"a\tb,c\t")), "tsv")
+        self.assertEqual(detect_format(excel_file=io.BytesIO(b"a,b")), "csv")
+        with open("test/test.xlsx", "rb") as excel_file:
+            self.assertEqual(
+                detect_format(excel_file=io.BytesIO(excel_file.read())), "xlsx"
+            )
+
+
+class VectorizedExcelHandler(ExcelHandler):
+    first = fields.FloatField(col=0, default=None)
+    second = fields.IntegerField(col=1, default=0)
+    third = fields.CharField(col=2, default="hello")
+
+
+class TestCastMany(unittest.TestCase):
+    def test_integer_field(self):
+        field = fields.IntegerField(col=0)
+        field.name = "number"
+
+        self.assertEqual(field.cast_many([1, 2, 3]), ([1, 2, 3], []))
+        self.assertEqual(field.cast_many([1.5, 2]), ([1, 2], []))
+
+        values, errors = field.cast_many([1, "a", "3", None])
+        self.assertEqual(values, [1, "a", 3, None])
+        self.assertEqual([index for index, error in errors], [1, 3])
+
+        values, errors = field.cast_many([1, None, 2.0], skip_none=True)
+        self.assertEqual(values, [1, None, 2])
+        self.assertEqual(errors, [])
+
+    def test_float_field(self):
+        field = fields.FloatField(col=0)
+        field.name = "number"
+
+        values, errors = field.cast_many([1, 2.5, "3"])
+        self.assertEqual(values, [1.0, 2.5, 3.0])
+        self.assertIs(type(values[0]), float)
+
+    def test_char_field(self):
+        field = fields.CharField(col=0, default="default")
+        field.name = "text"
+
+        self.assertEqual(field.cast_many(["a", "b"]), (["a", "b"], []))
+        self.assertEqual(field.cast_many([1, 2.5]), (["1", "2.5"], []))
+        self.assertEqual(
+            field.cast_many(["a", " ", None], skip_none=True),
+            (["a", "default", None], []),
+        )
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy(self):
+        field = fields.IntegerField(col=0)
+        field.name = "number"
+
+        values, errors = field.cast_many(numpy.array([1.5, 2.0]))
+        self.assertEqual(values.dtype, numpy.int64)
+        self.assertEqual(values.tolist(), [1, 2])
+
+        values, errors = field.cast_many(numpy.array([1.0, numpy.nan]))
+        self.assertEqual([index for index, error in errors], [1])
+
+    def test_read(self):
+        eh = VectorizedExcelHandler(path="test/test.xlsx")
+        eh.read_chunk_size = 2
+        data, errors = eh.read(return_errors=True)
+
+        self.assertEqual(data, [])
+        self.assertEqual([error.row for error in errors], [1, 2])
+        self.assertEqual(errors[0].row_data, {"first": 1.0})
+        self.assertEqual(errors[0].field_name, "second")
+
+        eh.set_sheet_by_name("Sheet4")
+        data, errors = eh.read(return_errors=True, ignore_blank_rows=False)
+        self.assertEqual(
+            data,
+            [
+                {"first": None, "second": 0, "third": "hello"},
+                {"first": 101.0, "second": 0, "third": "hello"},
+            ],
+        )
+
+        self.assertRaises(ValueError, eh.read, failfast=True)
+
+
+class CentsField(fields.IntegerField):
+    def __init__(self, *args, **kwargs):
+        super(CentsField, self).__init__(*args, **kwargs)
+        self.cast_method = lambda value: int(float(value) * 100)
+
+
+class UpperCharField(fields.CharField):
+    def __init__(self, *args, **kwargs):
+        super(UpperCharField, self).__init__(*args, **kwargs)
+        self.cast_method = lambda value: str(value).upper()
+
+
+class CastMethodExcelHandler(ExcelHandler):
+    cents = CentsField(col=0)
+    text = UpperCharField(col=1)
+
+
+class TestCastMethod(unittest.TestCase):
+    # subclasses that set their own cast_method are not vectorized
+    def test_cast_many(self):
+        cents = CentsField(col=0)
+        cents.name = "cents"
+        text = UpperCharField(col=1)
+        text.name = "text"
+
+        self.assertEqual(cents.cast_many([3, 1.5]), ([300, 150], []))
+        self.assertEqual(text.cast_many(["abc", 1]), (["ABC", "1"], []))
+        if numpy is not None:
+            self.assertEqual(cents.cast_many(numpy.array([3, 4])), ([300, 400], []))
+
+    def test_read(self):
+        excel_file = io.BytesIO()
+        workbook = xlsxwriter.Workbook(excel_file)
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, [3, "abc"])
+        sheet.write_row(1, 0, [1.5, "def"])
+        workbook.close()
+        excel_file.seek(0)
+
+        for backend in ("openpyxl", "xml"):
+            eh = CastMethodExcelHandler(excel_file=excel_file, backend=backend)
+            self.assertEqual(
+                eh.read(),
+                [{"cents": 300, "text": "ABC"}, {"cents": 150, "text": "DEF"}],
+            )
+            if numpy is not None:
+                columns, masks = eh.read_columns()
+                self.assertEqual(list(columns["cents"]), [300, 150])
+
+
+class TestChoices(unittest.TestCase):
+    CHOICES = ((1, "One"), (2, "Two"))
+
+    def test_cast(self):
+        field = fields.IntegerField(col=0, choices=self.CHOICES, default=0)
+        field.name = "number"
+
+        self.assertEqual(field.cast("One", None, {}), 1)
+        self.assertEqual(field.cast(" ", None, {}), 0)
+        self.assertRaises(KeyError, field.cast, "one", None, {})
+
+        values, errors = field.cast_many(["Two", "three", None], skip_none=True)
+        self.assertEqual(values, [2, "three", None])
+        self.assertEqual([index for index, error in errors], [1])
+        self.assertIsInstance(errors[0][1], KeyError)
+
+    def test_normalized(self):
+        field = fields.IntegerField(
+            col=0,
+            choices=self.CHOICES,
+            choices_case_insensitive=True,
+            choices_strip=True,
+        )
+        field.name = "number"
+
+        self.assertEqual(field.cast(" one ", None, {}), 1)
+        self.assertEqual(field.cast_many(["TWO", "One "]), ([2, 1], []))
+
+    def test_subclass_cast_method(self):
+        class DecimalField(fields.Field):
+            def __init__(self, *args, **kwargs):
+                super(DecimalField, self).__init__(*args, **kwargs)
+                self.cast_method = decimal.Decimal
+
+        field = DecimalField(col=0, choices=((1, "one"),))
+        field.name = "amount"
+
+        value = field.cast("one", None, {})
+        self.assertEqual(value, decimal.Decimal(1))
+        self.assertIsInstance(value, decimal.Decimal)
+        self.assertIsInstance(field.cast_many(["one"])[0][0], decimal.Decimal)
+
+    def test_to_excel(self):
+        field = fields.CharField(col=0, choices=(("a", "A"),))
+        field.name = "letter"
+
+        self.assertEqual(field.to_excel("a"), "A")
+        self.assertEqual(field.to_excel(None), None)
+        self.assertRaises(KeyError, field.to_excel, "b")
+
+        convert = field.get_converter()
+        self.assertEqual(convert("a"), "A")
+        self.assertEqual(convert(None), None)
+        self.assertRaises(KeyError, convert, "b")
+
+
+class TestSerialDates(unittest.TestCase):
+    def test_converter(self):
+        for epoch in (dates.WINDOWS_EPOCH, dates.MAC_EPOCH):
+            converter = dates.SerialDateConverter(epoch)
+            for value in (0, 0.25, 1, 59, 60, 61, 45000, 45000.5, 45123.123456):
+                self.assertEqual(converter.to_datetime(value), from_excel(value, epoch))
+
+        converter = dates.SerialDateConverter()
+        self.assertEqual(converter.to_date(45000.75), datetime.date(2023, 3, 15))
+        self.assertEqual(converter.to_time(45000.75), datetime.time(18))
+        self.assertEqual(
+            converter.to_dates([45000, None]), [datetime.date(2023, 3, 15), None]
+        )
+
+    def test_workbook_epoch(self):
+        class Workbook(object):
+            epoch = dates.MAC_EPOCH
+
+        workbook = Workbook()
+        converter = dates.get_serial_date_converter(workbook)
+        self.assertEqual(converter.epoch, dates.MAC_EPOCH)
+        self.assertIs(converter, dates.get_serial_date_converter(workbook))
+        self.assertEqual(
+            dates.get_serial_date_converter(None).epoch, dates.WINDOWS_EPOCH
+        )
+
+    def test_fields(self):
+        field = fields.DateField(col=0)
+        field.name = "date"
+        self.assertEqual(field.cast(45000.5, None, {}), datetime.date(2023, 3, 15))
+        self.assertEqual(
+            field.cast_many([45000, datetime.datetime(2020, 1, 2, 3)]),
+            ([datetime.date(2023, 3, 15), datetime.date(2020, 1, 2)], []),
+        )
+
+        field = fields.DateTimeField(col=0)
+        field.name = "datetime"
+        self.assertEqual(
+            field.cast_many([45000.5, None], skip_none=True),
+            ([datetime.datetime(2023, 3, 15, 12), None], []),
+        )
+
+        field = fields.TimeField(col=0)
+        field.name = "time"
+        self.assertEqual(field.cast(45000.5, None, {}), datetime.time(12))
+        self.assertEqual(
+            field.cast_many([0.75, datetime.datetime(2020, 1, 2, 3)]),
+            ([datetime.time(18), datetime.time(3)], []),
+        )
+
+    def test_parse_iso(self):
+        self.assertEqual(
+            dates.parse_iso_datetime("2020-01-02"), datetime.datetime(2020, 1, 2)
+        )
+        self.assertEqual(
+            dates.parse_iso_datetime("2020-01-02 03:04:05.5"),
+            datetime.datetime(2020, 1, 2, 3, 4, 5, 500000),
+        )
+        self.assertEqual(
+            dates.parse_iso_datetime("2020-01-02T03:04-03:00"),
+            datetime.datetime(
+                2020, 1, 2, 3, 4, tzinfo=datetime.timezone(-datetime.timedelta(hours=3))
+            ),
+        )
+        self.assertEqual(dates.parse_iso_time("03:04:05"), datetime.time(3, 4, 5))
+        self.assertEqual(
+            dates.parse_iso_time("2020-01-02 03:04"),
+            datetime.datetime(2020, 1, 2, 3, 4),
+        )
+        for value in ("n/a", "2020-13-01", "2020-01-02 03:4", "25:00"):
+            self.assertRaises(ValueError, dates.parse_iso_time, value)
+
+    def test_out_of_range(self):
+        field = fields.DateField(col=0)
+        field.name = "date"
+
+        columns = [[45000, 1e10]]
+        if numpy is not None:
+            columns.append(numpy.array(columns[0]))
+        for values in columns:
+            values, errors = field.cast_many(values)
+            self.assertEqual(values, [datetime.date(2023, 3, 15), 1e10])
+            self.assertEqual([index for index, error in errors], [1])
+            self.assertIsInstance(errors[0][1], OverflowError)
+
+        class DateExcelHandler(ExcelHandler):
+            date = fields.DateField(col=0)
+
+        excel_file = io.BytesIO()
+        workbook = xlsxwriter.Workbook(excel_file)
+        workbook.add_worksheet().write_column(0, 0, [45000, 1e10, 45001])
+        workbook.close()
+        excel_file.seek(0)
+
+        data, errors = DateExcelHandler(excel_file=excel_file).read(return_errors=True)
+        self.assertEqual(
+            data,
+            [
+                {"date": datetime.date(2023, 3, 15)},
+                {"date": datetime.date(2023, 3, 16)},
+            ],
+        )
+        self.assertEqual([error.row for error in errors], [2])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy(self):
+        converter = dates.SerialDateConverter()
+        values = converter.to_datetimes(numpy.array([45000.5, 59]))
+        self.assertEqual(
+            values.tolist(),
+            [datetime.datetime(2023, 3, 15, 12), datetime.datetime(1900, 2, 28)],
+        )
+
+
 class TestEmptyRows(unittest.TestCase):
     def setUp(self):
         super(TestEmptyRows, self).setUp()
@@ -378,5 +1710,211 @@ class TestForeignKeyField(unittest.TestCase):
                 self.assertEqual(read_value, expected_value)
 
 
+class TestForeignKeyLookupStrategy(unittest.TestCase):
+    def setUp(self):
+        super(TestForeignKeyLookupStrategy, self).setUp()
+        Query.evaluations = 0
+
+    def test_full(self):
+        eh = ForeignKeyExcelHandler(path="test/test.xlsx")
+        eh.set_sheet_by_name("Sheet4")
+        data = eh.read()
+
+        self.assertEqual([row["first"] for row in data], ["one", "five", "101"])
+        self.assertEqual(Query.evaluations, 1)
+
+    def test_on_demand(self):
+        eh = OnDemandForeignKeyExcelHandler(path="test/test.xlsx")
+        eh.set_sheet_by_name("Sheet4")
+        data = eh.read()
+
+        self.assertEqual([row["first"] for row in data], ["one", "five", "101"])
+        # the lookup type and the values of the only chunk
+        self.assertEqual(Query.evaluations, 2)
+
+    def test_on_demand_evicted(self):
+        class SmallCacheExcelHandler(OnDemandForeignKeyExcelHandler):
+            first = fields.ForeignKeyField(
+                model=Model,
+                col=0,
+                lookup="code",
+                default=None,
+                lookup_strategy="on_demand",
+                cache_size=2,
+            )
+
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, "codes.xlsx")
+        workbook = xlsxwriter.Workbook(path)
+        sheet = workbook.add_worksheet()
+        sheet.write_column(0, 0, [101, 5, 1, "abc", 101, 5, 1])
+        workbook.close()
+
+        # chunks with more values than the cache holds, and values that are
+        # not lookups, are errors of their rows only
+        data, errors = SmallCacheExcelHandler(path=path).read(return_errors=True)
+        self.assertEqual([row["first"] for row in data], ["101", "five", "one"] * 2)
+        self.assertEqual([error.row for error in errors], [4])
+        self.assertEqual(errors[0].field_name, "first")
+        shutil.rmtree(tmp_dir)
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache["a"] = 1
+        cache["b"] = 2
+        self.assertEqual(cache["a"], 1)
+
+        cache["c"] = 3
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIsNone(cache.get("b"))
+
+    def test_on_demand_write(self):
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, "out.xlsx")
+
+        eh = OnDemandForeignKeyExcelHandler(path=path, mode="w")
+        eh.add_sheet("Data")
+        eh.write([{"first": "five"}, {"first": "one"}, {"first": None}])
+        eh.save()
+
+        self.assertEqual(Query.evaluations, 2)
+
+        eh = ExcelHandler(path=path)
+        self.assertEqual(eh.read_rows(["first"], row_type=tuple), [(5,), (1,)])
+        shutil.rmtree(tmp_dir)
+
+
+class TestForeignKeyLookupCache(unittest.TestCase):
+    def setUp(self):
+        super(TestForeignKeyLookupCache, self).setUp()
+        Query.evaluations = 0
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestForeignKeyLookupCache, self).tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+    def read_twice(self, cache):
+        class CachedForeignKeyExcelHandler(ExcelHandler):
+            first = fields.ForeignKeyField(
+                model=Model, col=0, default=None, cache=cache
+            )
+
+        for i in range(2):
+            eh = CachedForeignKeyExcelHandler(path="test/test.xlsx")
+            eh.set_sheet_by_name("Sheet4")
+            data = eh.read()
+            self.assertEqual([row["first"] for row in data], ["one", "five", "101"])
+
+    def test_memory_cache(self):
+        cache = MemoryLookupCache()
+        self.read_twice(cache)
+
+        self.assertEqual(Query.evaluations, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.version = 2
+        self.read_twice(cache)
+        self.assertEqual(Query.evaluations, 2)
+
+    def test_sqlite_cache(self):
+        path = os.path.join(self.tmp_dir, "cache.sqlite3")
+        self.read_twice(SQLiteLookupCache(path))
+        self.assertEqual(Query.evaluations, 1)
+
+        # a new instance, as the one of another process, uses the same file
+        cache = SQLiteLookupCache(path)
+        self.read_twice(cache)
+        self.assertEqual(Query.evaluations, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+        cache.invalidate(
+            fields.ForeignKeyField(model=Model, col=0, lookup="pk").cache_key
+        )
+        self.read_twice(cache)
+        self.assertEqual(Query.evaluations, 2)
+        cache.close()
+
+    def test_ttl(self):
+        cache = MemoryLookupCache(ttl=-1)
+        self.read_twice(cache)
+
+        self.assertEqual(Query.evaluations, 2)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_incomplete_backend(self):
+        class LoadOnlyLookupCache(LookupCache):
+            def load(self, key):
+                return None
+
+        self.assertRaises(TypeError, LoadOnlyLookupCache)
+
+
+class TestDjangoModelField(unittest.TestCase):
+    def setUp(self):
+        super(TestDjangoModelField, self).setUp()
+        Item.objects.queries = 0
+
+    def read(self, excel_handler_cls):
+        eh = excel_handler_cls(path="test/test.xlsx")
+        eh.set_sheet_by_name("Sheet4")
+        data, errors = eh.read(return_errors=True)
+
+        self.assertEqual([row["item"].pk for row in data], [1, 5])
+        self.assertEqual([error.row for error in errors], [4])
+
+    def test_read(self):
+        self.read(ItemExcelHandler)
+        self.assertEqual(Item.objects.queries, 3)
+
+    def test_batch_read(self):
+        self.read(BatchItemExcelHandler)
+        self.assertEqual(Item.objects.queries, 1)
+
+    def test_batch_read_chunks(self):
+        BatchItemExcelHandler.read_chunk_size = 2
+        try:
+            self.read(BatchItemExcelHandler)
+        finally:
+            BatchItemExcelHandler.read_chunk_size = ExcelHandler.read_chunk_size
+
+        self.assertEqual(Item.objects.queries, 2)
+
+    def test_batch_read_text(self):
+        # csv files have the keys as text
+        for excel_handler_cls in (ItemExcelHandler, BatchItemExcelHandler):
+            eh = excel_handler_cls(excel_file=io.StringIO("1\n5\n7\n"), format="csv")
+            data, errors = eh.read(return_errors=True)
+
+            self.assertEqual([row["item"].pk for row in data], [1, 5])
+            self.assertEqual([error.row for error in errors], [3])
+
+    def test_batch_read_invalid(self):
+        # values that fail the query are errors of their rows only
+        for excel_handler_cls in (ItemExcelHandler, BatchItemExcelHandler):
+            csv_file = io.StringIO("1\nabc\n5\n7\n")
+            eh = excel_handler_cls(excel_file=csv_file, format="csv")
+            data, errors = eh.read(return_errors=True)
+
+            self.assertEqual([row["item"].pk for row in data], [1, 5])
+            self.assertEqual([error.row for error in errors], [2, 4])
+            self.assertIn("expected a number", errors[0].error)
+
+    def test_write(self):
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, "out.xlsx")
+
+        eh = ItemExcelHandler(path=path, mode="w")
+        eh.add_sheet("Items")
+        eh.write([{"item": Item.objects.items[5]}, {"item": None}])
+        eh.save()
+
+        eh = ExcelHandler(path=path)
+        self.assertEqual(eh.read_rows(["item"], row_type=tuple), [(5,)])
+        shutil.rmtree(tmp_dir)
+
+
 if __name__ == "__main__":
     unittest.main()